@@ -1,18 +1,42 @@
 #!/usr/bin/env python3
 """Run the RAG system server."""
 
-import uvicorn
+import os
 import sys
+import argparse
+import uvicorn
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.config.config import config
+from src.services.index_snapshot import MANIFEST_FILE, resolve_snapshot_path
 
 
 def main():
     """Start the server."""
+    parser = argparse.ArgumentParser(description="Run the RAG system server")
+    parser.add_argument("--workers", type=int, default=config.workers, help="number of worker processes")
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+    
+    # Workers share one memory-mapped index instead of each opening ChromaDB
+    vector_backend = config.vector_backend
+    if workers > 1 and vector_backend != "mmap":
+        if (resolve_snapshot_path(config.index_snapshot_path) / MANIFEST_FILE).exists():
+            vector_backend = "mmap"
+        else:
+            print("⚠️  No index snapshot, every worker opens ChromaDB. Run 'python scripts/init_db.py' first.")
+    
+    # Worker processes build their config from the environment, a single
+    # in-process server uses the config already loaded here; both take
+    # their share of the LLM quota from the worker count
+    os.environ["WORKERS"] = str(workers)
+    os.environ["VECTOR_BACKEND"] = vector_backend
+    config.workers = workers
+    config.vector_backend = vector_backend
+    
     print(f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║          🎓 University RAG System with AI Counselor          ║
@@ -20,12 +44,17 @@ def main():
 ║  📍 Server: http://{config.host}:{config.port:<24}          ║
 ║  📚 Docs:   http://{config.host}:{config.port}/docs{' '*21}║
 ║  🔍 Mode:   {'Debug' if config.debug else 'Production':<44} ║
+║  👥 Workers: {f'{workers} (index: {vector_backend})':<43} ║
 ╠══════════════════════════════════════════════════════════════╣
 ║  Endpoints:                                                  ║
 ║  • GET  /health     - System health check                    ║
+║  • GET  /health/deep - Live dependency check                 ║
 ║  • POST /query      - Ask the AI counselor                   ║
+║  • POST /query/stream - Streamed answer (SSE)                ║
+║  • POST /query/batch - Batch of questions                    ║
 ║  • GET  /filters    - Available filter options               ║
 ║  • GET  /stats      - System statistics                      ║
+║  • GET  /metrics    - Prometheus metrics                     ║
 ╚══════════════════════════════════════════════════════════════╝
     """)
     
@@ -33,7 +62,8 @@ def main():
         "src.main:app",
         host=config.host,
         port=config.port,
-        reload=config.debug,
+        reload=config.debug and workers == 1,
+        workers=workers,
         log_level="info" if config.debug else "warning"
     )
 
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Load test and latency benchmark for the RAG API."""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import requests
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from queries import TEST_QUERIES
+
+# Templates for the generated query set
+QUERY_TEMPLATES = [
+    "Какие университеты в городе {city} подходят для направления {category}?",
+    "Хочу поступить на {category}, у меня {score} баллов ЕНТ",
+    "{category} в городе {city}, ЕНТ {score}",
+    "Посоветуй вуз в городе {city} с проходным баллом до {score}",
+    "Лучшие университеты по направлению {category}",
+    "Где учиться на {category} с баллом {score}?",
+]
+
+BASE_URL = "http://localhost:8000"
+
+ENDPOINTS = ["/query", "/query/stream", "/query/batch"]
+
+# Answers the pipeline returns with HTTP 200 when processing or the LLM failed
+ERROR_ANSWER_PREFIXES = (
+    "Произошла ошибка при обработке запроса",
+    "Извините, произошла ошибка при генерации ответа",
+)
+
+
+def generate_queries(count: int, seed: int = 42) -> List[Dict]:
+    """Generate queries from dataset cities and categories, some with filters."""
+    from src.config.config import config
+    from src.utils.data_loader import DataLoader
+    
+    filters = DataLoader(config.data_path).load_filters()
+    cities = filters.get("cities") or ["Алматы", "Астана"]
+    categories = filters.get("categories") or ["IT и технологии"]
+    
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        city, category = rng.choice(cities), rng.choice(categories)
+        score = rng.randrange(50, 131, 5)
+        query = {
+            "question": rng.choice(QUERY_TEMPLATES).format(city=city, category=category, score=score),
+            "filters": None
+        }
+        roll = rng.random()
+        if roll < 0.2:
+            query["filters"] = {"city": city}
+        elif roll < 0.3:
+            query["filters"] = {"category": category, "max_score": score}
+        queries.append(query)
+    return queries
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile of sorted values with linear interpolation."""
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def read_stream(response: requests.Response) -> Dict:
+    """Collect Server-Sent Events of a streamed answer into a /query-like result."""
+    result: Dict = {}
+    tokens, event = [], None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+            if event == "token":
+                tokens.append(data)
+            elif event == "done":
+                result.update(data)
+            elif event == "error":
+                result["error"] = data.get("detail") or "stream error"
+    result["answer"] = "".join(tokens)
+    return result
+
+
+def item_error(item: Dict) -> Optional[str]:
+    """Failure of one answered query: error field or an error answer text."""
+    if item.get("error"):
+        return "item error"
+    if (item.get("answer") or "").startswith(ERROR_ANSWER_PREFIXES):
+        return "error answer"
+    return None
+
+
+class Benchmark:
+    """
+    Replay queries against the server and record per-request outcomes.
+    
+    Closed loop: ``concurrency`` workers send requests back to back.
+    Open loop: requests arrive at ``rate`` per second (Poisson or uniform)
+    regardless of how fast the server answers; latency is measured from the
+    scheduled arrival, so time spent waiting for a free worker is included.
+    
+    ``/query/stream`` requests are timed until the stream ends; each
+    ``/query/batch`` request carries ``batch_size`` queries and fails if any
+    of its items does.
+    """
+    
+    def __init__(self, base_url: str, endpoint: str = "/query", timeout: float = 60.0, batch_size: int = 1):
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unsupported endpoint {endpoint}, expected one of {ENDPOINTS}")
+        self.endpoint = endpoint
+        self.url = base_url.rstrip("/") + endpoint
+        self.timeout = timeout
+        self.batch_size = batch_size if endpoint == "/query/batch" else 1
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+    
+    def _pick(self, queries: List[Dict], i: int) -> List[Dict]:
+        """Queries of the i-th request."""
+        return [queries[(i * self.batch_size + j) % len(queries)] for j in range(self.batch_size)]
+    
+    def _post(self, queries: List[Dict]) -> List[Dict]:
+        """Send one request, return per-query results; raise on HTTP errors."""
+        session = self._session()
+        if self.endpoint == "/query/batch":
+            response = session.post(self.url, json={"queries": queries}, timeout=self.timeout)
+            response.raise_for_status()
+            return [
+                item["response"] or {"error": item["error"]}
+                for item in response.json()["results"]
+            ]
+        
+        if self.endpoint == "/query/stream":
+            with session.post(self.url, json=queries[0], timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                return [read_stream(response)]
+        
+        response = session.post(self.url, json=queries[0], timeout=self.timeout)
+        response.raise_for_status()
+        return [response.json()]
+    
+    def _send(self, queries: List[Dict], scheduled: Optional[float] = None) -> Dict:
+        """Send one request and record latency, status and cache/fallback flags."""
+        start = scheduled if scheduled is not None else time.perf_counter()
+        record = {"question": queries[0]["question"], "status": None, "error": None, "cached": False, "fallback": False}
+        try:
+            items = self._post(queries)
+            record["status"] = 200
+            record["error"] = next((error for error in map(item_error, items) if error), None)
+            record["cached"] = all(item.get("cached", False) for item in items)
+            record["fallback"] = any(item.get("fallback", False) for item in items)
+        except requests.HTTPError as e:
+            record["status"] = e.response.status_code
+            record["error"] = f"HTTP {e.response.status_code}"
+        except Exception as e:
+            record["error"] = type(e).__name__
+        record["latency"] = time.perf_counter() - start
+        
+        with self._lock:
+            self.records.append(record)
+        return record
+    
+    def run_closed(self, queries: List[Dict], total: int, concurrency: int) -> float:
+        """Run ``total`` requests with ``concurrency`` workers, return wall time."""
+        counter = iter(range(total))
+        counter_lock = threading.Lock()
+        
+        def worker():
+            while True:
+                with counter_lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                self._send(self._pick(queries, i))
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(worker)
+        return time.perf_counter() - start
+    
+    def run_open(
+        self,
+        queries: List[Dict],
+        total: int,
+        rate: float,
+        max_inflight: int,
+        arrival: str = "poisson",
+        seed: int = 42
+    ) -> float:
+        """Send ``total`` requests at ``rate`` per second, return wall time."""
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        scheduled = start
+        with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+            for i in range(total):
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, self._pick(queries, i), scheduled)
+                scheduled += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+        return time.perf_counter() - start
+    
+    def summary(self, wall_time: float) -> Dict:
+        """
+        Latency percentiles, throughput, error rate and cache-hit ratio.
+        
+        Error rate includes error answers sent with HTTP 200; failure rate
+        also counts fallback answers built without the LLM.
+        """
+        records = self.records
+        ok = [r for r in records if r["error"] is None]
+        latencies = sorted(r["latency"] for r in ok)
+        
+        def latency_stats(values: List[float]) -> Dict:
+            values = sorted(values)
+            return {
+                "count": len(values),
+                "mean": sum(values) / len(values) if values else None,
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": values[-1] if values else None,
+            }
+        
+        errors: Dict[str, int] = {}
+        for r in records:
+            if r["error"] is not None:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+        
+        return {
+            "requests": len(records),
+            "successful": len(ok),
+            "wall_time": wall_time,
+            "qps": len(ok) / wall_time if wall_time > 0 else 0.0,
+            "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+            "failure_rate": (
+                (len(records) - len(ok) + sum(r["fallback"] for r in ok)) / len(records) if records else 0.0
+            ),
+            "errors": errors,
+            "cache_hit_ratio": sum(r["cached"] for r in ok) / len(ok) if ok else 0.0,
+            "fallback_ratio": sum(r["fallback"] for r in ok) / len(ok) if ok else 0.0,
+            "latency": latency_stats(latencies),
+            "latency_cached": latency_stats([r["latency"] for r in ok if r["cached"]]),
+            "latency_uncached": latency_stats([r["latency"] for r in ok if not r["cached"]]),
+        }
+
+
+def check_health(base_url: str) -> Optional[Dict]:
+    """Get /health, or None if the server is not reachable."""
+    try:
+        response = requests.get(f"{base_url}/health", timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"❌ Server is not available: {e}")
+        return None
+
+
+def print_summary(summary: Dict):
+    """Print summary as a table."""
+    def ms(value: Optional[float]) -> str:
+        return f"{value * 1000:9.1f}" if value is not None else f"{'-':>9}"
+    
+    print("\n" + "=" * 60)
+    print("📊 Benchmark Results")
+    print("=" * 60)
+    print(f"   Requests:        {summary['requests']} ({summary['successful']} ok)")
+    print(f"   Wall time:       {summary['wall_time']:.2f}s")
+    print(f"   Throughput:      {summary['qps']:.2f} req/s")
+    print(f"   Error rate:      {summary['error_rate']:.2%} {summary['errors'] or ''}")
+    print(f"   Failure rate:    {summary['failure_rate']:.2%} (errors + fallback answers)")
+    print(f"   Cache hit ratio: {summary['cache_hit_ratio']:.2%}")
+    print(f"   Fallback ratio:  {summary['fallback_ratio']:.2%}")
+    print(f"\n   {'latency, ms':<12} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for label, key in (("all", "latency"), ("cached", "latency_cached"), ("uncached", "latency_uncached")):
+        stats = summary[key]
+        print(
+            f"   {label:<12} {stats['count']:>6} {ms(stats['mean'])} {ms(stats['p50'])} "
+            f"{ms(stats['p95'])} {ms(stats['p99'])} {ms(stats['max'])}"
+        )
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=BASE_URL, help="server base URL")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="/query", help="endpoint to POST queries to")
+    parser.add_argument("--batch-size", type=int, default=8, help="queries per /query/batch request")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="number of measured requests")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="closed-loop workers")
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate, req/s (overrides --concurrency)")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--max-inflight", type=int, default=256, help="open-loop worker limit")
+    parser.add_argument("--generated", type=int, default=50, help="generated queries added to TEST_QUERIES")
+    parser.add_argument("--warmup", type=int, default=0, help="unmeasured requests sent first")
+    parser.add_argument("--clear-cache", action="store_true", help="POST /cache/clear before the run")
+    parser.add_argument("--shuffle", action="store_true", help="shuffle the query set")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60.0, help="request timeout, seconds")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+    
+    health = check_health(args.url)
+    if health is None:
+        print("   Start the server with: python run.py")
+        sys.exit(1)
+    
+    queries = TEST_QUERIES + generate_queries(args.generated, args.seed)
+    if args.shuffle:
+        random.Random(args.seed).shuffle(queries)
+    
+    if args.clear_cache:
+        requests.post(f"{args.url}/cache/clear", timeout=10)
+    
+    mode = f"open loop, {args.rate} req/s ({args.arrival})" if args.rate else f"closed loop, concurrency {args.concurrency}"
+    print(f"🧪 {args.requests} requests to {args.endpoint}, {len(queries)} distinct queries, {mode}")
+    
+    if args.warmup:
+        Benchmark(args.url, args.endpoint, args.timeout, args.batch_size).run_closed(
+            queries, args.warmup, args.concurrency
+        )
+    
+    benchmark = Benchmark(args.url, args.endpoint, args.timeout, args.batch_size)
+    if args.rate:
+        wall_time = benchmark.run_open(
+            queries, args.requests, args.rate, args.max_inflight, args.arrival, args.seed
+        )
+    else:
+        wall_time = benchmark.run_closed(queries, args.requests, args.concurrency)
+    
+    summary = benchmark.summary(wall_time)
+    print_summary(summary)
+    
+    if args.output:
+        result = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": vars(args),
+            "server": health,
+            "query_set": len(queries),
+            "summary": summary,
+        }
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2))
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Export embedding model to ONNX with dynamic int8 quantization."""
+
+import sys
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.config.config import config
+from src.services.embedding_models import OnnxEmbeddingModel, ONNX_MODEL_FILE, ONNX_INFO_FILE
+from src.utils.data_loader import DataLoader
+from queries import TEST_QUERIES
+
+
+def export_model(output_dir: Path):
+    """Export fp32 ONNX graph and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from sentence_transformers import SentenceTransformer
+    
+    model = SentenceTransformer(config.embedding_model, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    
+    fp32_path = output_dir / "model_fp32.onnx"
+    int8_path = output_dir / ONNX_MODEL_FILE
+    
+    sample = tokenizer(["пример текста"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    
+    print(f"   ⏳ Exporting {config.embedding_model}...")
+    torch.onnx.export(
+        transformer,
+        tuple(sample[name] for name in input_names),
+        str(fp32_path),
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            **{name: {0: "batch", 1: "sequence"} for name in input_names},
+            "last_hidden_state": {0: "batch", 1: "sequence"}
+        },
+        opset_version=14
+    )
+    tokenizer.save_pretrained(str(output_dir))
+    (output_dir / ONNX_INFO_FILE).write_text(json.dumps({"embedding_model": config.embedding_model}))
+    
+    print("   ⏳ Quantizing weights to int8...")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    
+    print(f"   ✅ Saved: {int8_path} ({int8_path.stat().st_size / 1e6:.1f} MB)")
+    return model
+
+
+def top_k(doc_embeddings: np.ndarray, query_embeddings: np.ndarray, k: int) -> np.ndarray:
+    """Top-k document indices by squared L2 distance (ChromaDB default space)."""
+    distances = (
+        (query_embeddings ** 2).sum(axis=1)[:, None]
+        - 2 * query_embeddings @ doc_embeddings.T
+        + (doc_embeddings ** 2).sum(axis=1)[None, :]
+    )
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def check_retrieval(fp32_model, onnx_model: OnnxEmbeddingModel, k: int, min_recall: float) -> bool:
+    """Compare top-k retrieval of int8 and fp32 embeddings on the bundled dataset."""
+    loader = DataLoader(config.data_path)
+    chunks = loader.prepare_chunks(loader.load_universities())
+    texts = [chunk["text"] for chunk in chunks]
+    
+    queries = [q["question"] for q in TEST_QUERIES]
+    queries += [f"{chunk['metadata']['programs']} {chunk['metadata']['city']}" for chunk in chunks]
+    
+    fp32_top = top_k(fp32_model.encode(texts), fp32_model.encode(queries), k)
+    int8_top = top_k(onnx_model.encode(texts), onnx_model.encode(queries), k)
+    
+    identical = 0
+    recalls = []
+    for query, expected, actual in zip(queries, fp32_top, int8_top):
+        overlap = len(set(expected) & set(actual)) / k
+        recalls.append(overlap)
+        if overlap == 1.0:
+            identical += 1
+        else:
+            print(f"   ⚠️ '{query[:40]}': fp32 {list(expected)} vs int8 {list(actual)}")
+    
+    recall = float(np.mean(recalls))
+    print(f"   📊 Identical top-{k}: {identical}/{len(queries)} queries, recall@{k}: {recall:.3f}")
+    return recall >= min_recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default=config.onnx_model_dir, help="Output directory")
+    parser.add_argument("--top-k", type=int, default=config.top_k_results, help="k for retrieval check")
+    parser.add_argument("--min-recall", type=float, default=1.0, help="Minimum recall@k vs fp32")
+    args = parser.parse_args()
+    
+    output_dir = Path(args.output)
+    if not output_dir.is_absolute():
+        output_dir = Path(__file__).parent.parent / output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    print("=" * 50)
+    print("🧮 Embedding model - ONNX int8 export")
+    print("=" * 50)
+    
+    print("\n📦 Exporting model...")
+    fp32_model = export_model(output_dir)
+    onnx_model = OnnxEmbeddingModel(str(output_dir))
+    
+    print("\n🔍 Checking retrieval against fp32 model...")
+    if not check_retrieval(fp32_model, onnx_model, args.top_k, args.min_recall):
+        print("\n❌ Quantized model retrieves different top-k than fp32")
+        sys.exit(1)
+    
+    print("\n✅ Done! Set EMBEDDING_BACKEND=onnx and re-run 'python scripts/init_db.py'.")
+
+
+if __name__ == "__main__":
+    main()
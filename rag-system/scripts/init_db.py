@@ -38,12 +38,24 @@ def init_database():
         
         vector_store = VectorStore(
             persist_directory=config.vector_db_path,
-            embedding_model_name=config.embedding_model
+            embedding_model_name=config.embedding_model,
+            embedding_backend=config.embedding_backend,
+            onnx_model_dir=config.onnx_model_dir
         )
         
         # Index documents
         print("\n📊 Indexing documents...")
-        vector_store.index_documents(chunks)
+        stats = vector_store.index_documents(chunks)
+        
+        print(f"   ➕ Added:     {stats['added']}")
+        print(f"   🔄 Updated:   {stats['updated']}")
+        print(f"   ➖ Removed:   {stats['removed']}")
+        print(f"   ⏸️ Unchanged: {stats['unchanged']}")
+        
+        # Memory-mapped copy for worker processes (VECTOR_BACKEND=mmap)
+        print("\n💾 Writing index snapshot...")
+        version = vector_store.write_snapshot(config.index_snapshot_path)
+        print(f"   ✅ Snapshot {version}: {config.index_snapshot_path}")
         
         print("\n" + "=" * 50)
         print("✅ Database initialized successfully!")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Compare prompt tokens of full and compact context rendering on the dataset."""
+
+import sys
+import argparse
+from pathlib import Path
+from statistics import mean
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config.config import config
+from src.utils.data_loader import DataLoader
+from src.services.context_packer import ContextPacker, compact_variants, estimate_tokens, field_variants
+from src.services.llm_service import SYSTEM_PROMPT, SYSTEM_PROMPT_SHORT
+
+
+QUESTION = "Хочу стать программистом, ЕНТ 100 баллов, живу в Алматы"
+
+# _build_prompt text around the system prompt, context and question
+PROMPT_FRAME = (
+    "\n\n---\n\nКОНТЕКСТ (информация об университетах Казахстана):\n\n\n---\n\n"
+    "ВОПРОС АБИТУРИЕНТА:\n\n\n---\n\n"
+    "Дай развернутый ответ, используя ТОЛЬКО информацию из контекста выше.\n"
+    "Если в контексте нет нужной информации, честно скажи об этом.\n"
+)
+
+
+def measure(top_k: int, budget: int):
+    """Print per-document, per-context and per-prompt token estimates."""
+    loader = DataLoader(config.data_path)
+    chunks = loader.prepare_chunks(loader.load_universities())
+    full_docs = [field_variants(chunk["text"]) for chunk in chunks]
+    compact_docs = [compact_variants(chunk["metadata"]) for chunk in chunks]
+    
+    # Every window of top_k consecutive universities stands in for a search result
+    windows = [range(i, i + top_k) for i in range(len(chunks) - top_k + 1)]
+    
+    def contexts(docs, compact: bool, max_tokens: int):
+        packer = ContextPacker(max_tokens=max_tokens, compact=compact)
+        return [packer.pack([docs[i] for i in window]) for window in windows]
+    
+    unlimited = 10 ** 9
+    full = contexts(full_docs, False, unlimited)
+    compact = contexts(compact_docs, True, unlimited)
+    full_budget = contexts(full_docs, False, budget)
+    compact_budget = contexts(compact_docs, True, budget)
+    
+    frame = estimate_tokens(PROMPT_FRAME) + estimate_tokens(QUESTION)
+    system_full = estimate_tokens(SYSTEM_PROMPT)
+    system_short = estimate_tokens(SYSTEM_PROMPT_SHORT)
+    
+    def row(label: str, before: float, after: float):
+        saved = 100 * (before - after) / before if before else 0
+        print(f"{label:<34} {before:>8.0f} {after:>8.0f} {saved:>7.1f}%")
+    
+    print(f"Dataset: {len(chunks)} universities, top_k={top_k}, {len(windows)} contexts")
+    print(f"{'(estimated tokens)':<34} {'full':>8} {'compact':>8} {'saved':>8}")
+    row("document, mean", mean(estimate_tokens(d[0]) for d in full_docs),
+        mean(estimate_tokens(d[0]) for d in compact_docs))
+    row("document without contacts, mean", mean(estimate_tokens(d[1]) for d in full_docs),
+        mean(estimate_tokens(d[1]) for d in compact_docs))
+    row("system prompt", system_full, system_short)
+    row(f"context (top {top_k}), mean", mean(p.tokens for p in full), mean(p.tokens for p in compact))
+    row(f"prompt (top {top_k}), mean", mean(system_full + frame + p.tokens for p in full),
+        mean(system_short + frame + p.tokens for p in compact))
+    row("prompt, compact context only", mean(system_full + frame + p.tokens for p in full),
+        mean(system_full + frame + p.tokens for p in compact))
+    
+    print(f"\nWith MAX_CONTEXT_TOKENS={budget}:")
+    print(f"  full:    {mean(len(p.included) for p in full_budget):.1f} documents, "
+          f"{mean(len(p.trimmed) for p in full_budget):.1f} trimmed, "
+          f"{mean(p.tokens for p in full_budget):.0f} tokens")
+    print(f"  compact: {mean(len(p.included) for p in compact_budget):.1f} documents, "
+          f"{mean(len(p.trimmed) for p in compact_budget):.1f} trimmed, "
+          f"{mean(p.tokens for p in compact_budget):.0f} tokens")
+    
+    print("\nExample compact context:")
+    print(compact[0].text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=config.top_k_results)
+    parser.add_argument("--budget", type=int, default=config.max_context_tokens)
+    args = parser.parse_args()
+    
+    measure(args.top_k, args.budget)
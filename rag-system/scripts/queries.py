@@ -0,0 +1,33 @@
+"""Test queries shared by the benchmark and ONNX export scripts."""
+
+# Hand-written queries covering the main scenarios
+TEST_QUERIES = [
+    {
+        "question": "Какой университет выбрать для IT с баллом ЕНТ 75?",
+        "filters": None
+    },
+    {
+        "question": "Где можно учиться на врача в Алматы?",
+        "filters": {"city": "Алматы", "category": "Медицина"}
+    },
+    {
+        "question": "Технические ВУЗы в Астане",
+        "filters": {"city": "Астана"}
+    },
+    {
+        "question": "Сравни КазНУ и КБТУ для программиста",
+        "filters": None
+    },
+    {
+        "question": "У меня 90 баллов ЕНТ, люблю биологию, что посоветуешь?",
+        "filters": None
+    },
+    {
+        "question": "Университеты с экономическими специальностями",
+        "filters": {"category": "Бизнес и экономика"}
+    },
+    {
+        "question": "Педагогические университеты Казахстана",
+        "filters": {"category": "Педагогика"}
+    },
+]
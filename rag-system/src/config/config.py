@@ -14,37 +14,87 @@ load_dotenv(env_path)
 class Config:
     """Application configuration."""
     
-    # Gemini
+    # LLM
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+    llm_backend: str = os.getenv("LLM_BACKEND", "gemini")  # gemini | stub
+    stub_llm_latency: float = float(os.getenv("STUB_LLM_LATENCY", 0.8))  # seconds to first token
+    stub_llm_jitter: float = float(os.getenv("STUB_LLM_JITTER", 0.2))  # +- fraction of latency
+    stub_llm_tokens_per_second: float = float(os.getenv("STUB_LLM_TOKENS_PER_SECOND", 150))
+    stub_llm_completion_tokens: int = int(os.getenv("STUB_LLM_COMPLETION_TOKENS", 500))
+    stub_llm_failure_rate: float = float(os.getenv("STUB_LLM_FAILURE_RATE", 0))
+    stub_llm_seed: int = int(os.getenv("STUB_LLM_SEED", 42))
     
     # Paths
     data_path: str = os.getenv("DATA_PATH", "../universities_frontend.json")
+    dataset_check_interval: float = float(os.getenv("DATASET_CHECK_INTERVAL", 5))  # seconds between mtime checks
     vector_db_path: str = os.getenv("VECTOR_DB_PATH", "./data/vector_db")
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma")  # chroma | numpy | mmap
+    index_snapshot_path: str = os.getenv("INDEX_SNAPSHOT_PATH", "./data/index_snapshot")
     
     # Embedding
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
     embedding_dimension: int = int(os.getenv("EMBEDDING_DIMENSION", 384))
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx
+    onnx_model_dir: str = os.getenv("ONNX_MODEL_DIR", "./data/onnx")
     
     # RAG Settings
     top_k_results: int = int(os.getenv("TOP_K_RESULTS", 5))
     similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", 0.7))
-    max_context_length: int = int(os.getenv("MAX_CONTEXT_LENGTH", 4000))
+    max_context_tokens: int = int(os.getenv("MAX_CONTEXT_TOKENS", 1500))
+    context_format: str = os.getenv("CONTEXT_FORMAT", "full")  # full | compact
+    short_system_prompt: bool = os.getenv("SHORT_SYSTEM_PROMPT", "false").lower() == "true"
+    hybrid_candidates: int = int(os.getenv("HYBRID_CANDIDATES", 20))
+    rrf_k: int = int(os.getenv("RRF_K", 60))
+    planner_prefilter_ratio: float = float(os.getenv("PLANNER_PREFILTER_RATIO", 0.3))
+    planner_oversample: int = int(os.getenv("PLANNER_OVERSAMPLE", 4))
+    
+    # Concurrency
+    executor_workers: int = int(os.getenv("EXECUTOR_WORKERS", 4))
+    embedding_batch_window_ms: float = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", 5))
+    embedding_batch_max_size: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+    batch_llm_concurrency: int = int(os.getenv("BATCH_LLM_CONCURRENCY", 4))
     
     # Rate Limiting
     max_requests_per_minute: int = int(os.getenv("MAX_REQUESTS_PER_MINUTE", 15))
+    llm_burst_size: int = int(os.getenv("LLM_BURST_SIZE", 3))
+    llm_queue_size: int = int(os.getenv("LLM_QUEUE_SIZE", 100))
+    llm_queue_timeout: float = float(os.getenv("LLM_QUEUE_TIMEOUT", 30))
+    llm_deadline: float = float(os.getenv("LLM_DEADLINE", 15))  # seconds, used with fallback
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    circuit_recovery_timeout: float = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", 30))
+    
+    # Health monitoring
+    health_check_interval: float = float(os.getenv("HEALTH_CHECK_INTERVAL", 30))
+    health_llm_probe_interval: float = float(os.getenv("HEALTH_LLM_PROBE_INTERVAL", 300))
+    health_probe_timeout: float = float(os.getenv("HEALTH_PROBE_TIMEOUT", 10))
+    
+    # Cache
     cache_ttl: int = int(os.getenv("CACHE_TTL", 3600))
+    cache_max_size: int = int(os.getenv("CACHE_MAX_SIZE", 1000))
+    cache_backend: str = os.getenv("CACHE_BACKEND", "memory")  # memory | sqlite
+    cache_db_path: str = os.getenv("CACHE_DB_PATH", "./data/cache.sqlite3")
+    semantic_cache_max_size: int = int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", 10000))
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
     
     # Features
     enable_cache: bool = os.getenv("ENABLE_CACHE", "true").lower() == "true"
+    enable_semantic_cache: bool = os.getenv("ENABLE_SEMANTIC_CACHE", "true").lower() == "true"
+    enable_query_analysis: bool = os.getenv("ENABLE_QUERY_ANALYSIS", "true").lower() == "true"
+    enable_query_planner: bool = os.getenv("ENABLE_QUERY_PLANNER", "true").lower() == "true"
+    enable_hybrid_search: bool = os.getenv("ENABLE_HYBRID_SEARCH", "true").lower() == "true"
+    enable_embedding_batching: bool = os.getenv("ENABLE_EMBEDDING_BATCHING", "true").lower() == "true"
     enable_fallback: bool = os.getenv("ENABLE_FALLBACK", "false").lower() == "true"
     
     # Server
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", 8000))
+    workers: int = int(os.getenv("WORKERS", 1))
     debug: bool = os.getenv("DEBUG", "true").lower() == "true"
     
     def validate(self) -> bool:
         """Validate required configuration."""
+        if self.llm_backend == "stub":
+            return True
         if not self.gemini_api_key or self.gemini_api_key == "your_gemini_api_key_here":
             raise ValueError("GEMINI_API_KEY is not set in .env file")
         return True
@@ -1,24 +1,50 @@
 """FastAPI main application."""
 
+import json
+import math
+import time
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 
 from src.config.config import config
-from src.models.schemas import QueryRequest, RAGResponse, HealthCheck, FilterOptions
+from src.models.schemas import (
+    QueryRequest, RAGResponse, BatchQueryRequest, BatchQueryItem, BatchQueryResponse, 
+    HealthCheck, FilterOptions
+)
 from src.services.rag_pipeline import RAGPipeline
+from src.services.rate_limiter import RateLimitExceeded
+from src.services.health_monitor import HealthMonitor
 from src.utils.logger import logger
-from src.utils.data_loader import DataLoader
+from src.utils.dataset import get_dataset_store
+from src.utils.serialization import FastJSONResponse
+from src.utils.metrics import (
+    metrics, MetricsMiddleware, CACHE_ENTRIES, LLM_QUEUE_DEPTH, LLM_CIRCUIT_OPEN
+)
 
 
 # Global pipeline instance
 rag_pipeline: RAGPipeline = None
+health_monitor: HealthMonitor = None
+
+
+async def watch_dataset(pipeline: RAGPipeline, interval: float):
+    """Rebuild dataset-derived pipeline components after the dataset file changes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await pipeline.arefresh_dataset()
+        except Exception as e:
+            logger.error(f"Dataset refresh failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
-    global rag_pipeline
+    global rag_pipeline, health_monitor
+    dataset_watcher = None
     
     logger.info("🚀 Starting University RAG System...")
     
@@ -29,13 +55,34 @@ async def lifespan(app: FastAPI):
         # Initialize RAG pipeline
         rag_pipeline = RAGPipeline()
         
+        # Probe dependencies in the background, /health reads the result
+        health_monitor = HealthMonitor(
+            llm_service=rag_pipeline.llm_service,
+            vector_store=rag_pipeline.vector_store,
+            executor=rag_pipeline.executor,
+            interval=config.health_check_interval,
+            llm_probe_interval=config.health_llm_probe_interval,
+            probe_timeout=config.health_probe_timeout
+        )
+        await health_monitor.start()
+        
+        dataset_watcher = asyncio.create_task(
+            watch_dataset(rag_pipeline, max(1.0, config.dataset_check_interval))
+        )
+        
         logger.info("✅ RAG System ready to serve requests")
         yield
-        
+    
     except Exception as e:
         logger.error(f"❌ Failed to initialize: {e}")
         raise
     finally:
+        if dataset_watcher:
+            dataset_watcher.cancel()
+        if health_monitor:
+            await health_monitor.stop()
+        if rag_pipeline:
+            rag_pipeline.shutdown()
         logger.info("👋 Shutting down RAG System")
 
 
@@ -45,6 +92,7 @@ app = FastAPI(
     description="RAG-система для поиска университетов Казахстана с AI-профориентологом",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs" if config.debug else None,
     redoc_url="/redoc" if config.debug else None
 )
@@ -58,6 +106,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# In-flight gauge and latency histogram per endpoint
+app.add_middleware(MetricsMiddleware)
+
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -69,22 +120,35 @@ async def root():
     }
 
 
+def _health_response() -> HealthCheck:
+    """Build health response from the monitor's cached status."""
+    return HealthCheck(
+        status=health_monitor.status,
+        vector_db_count=health_monitor.vector_db_count,
+        embedding_model=config.embedding_model,
+        gemini_status=health_monitor.gemini_status,
+        cache_enabled=rag_pipeline.cache_enabled,
+        components=health_monitor.get_status()["components"]
+    )
+
+
 @app.get("/health", response_model=HealthCheck, tags=["Health"])
 async def health_check():
-    """Check system health."""
-    if not rag_pipeline:
+    """Check system health (cached, refreshed in the background)."""
+    if not rag_pipeline or not health_monitor:
         raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
     
-    stats = rag_pipeline.get_stats()
-    gemini_status = rag_pipeline.llm_service.check_health()
+    return _health_response()
+
+
+@app.get("/health/deep", response_model=HealthCheck, tags=["Health"])
+async def deep_health_check():
+    """Check system health with live probes, including a Gemini call."""
+    if not rag_pipeline or not health_monitor:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
     
-    return HealthCheck(
-        status="healthy" if gemini_status == "connected" else "degraded",
-        vector_db_count=stats["vector_db_count"],
-        embedding_model=config.embedding_model,
-        gemini_status=gemini_status,
-        cache_enabled=stats["cache_enabled"]
-    )
+    await health_monitor.check(deep=True)
+    return _health_response()
 
 
 @app.post("/query", response_model=RAGResponse, tags=["RAG"])
@@ -98,28 +162,84 @@ async def query(request: QueryRequest):
         raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
     
     try:
-        response = rag_pipeline.process(request)
-        return response
+        # Already serialized; cache hits skip model validation and encoding
+        body = await rag_pipeline.aprocess_json(request)
+        return Response(content=body, media_type="application/json")
+    except RateLimitExceeded as e:
+        logger.warning(f"Query not admitted: {e}")
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
     except Exception as e:
         logger.error(f"Query error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/query/batch", response_model=BatchQueryResponse, tags=["RAG"])
+async def query_batch(request: BatchQueryRequest):
+    """
+    Batch RAG query endpoint.
+    
+    Answers several questions (e.g. a whole school class) with shared
+    embedding and retrieval. Results keep the request order; a failed
+    item carries an error instead of failing the whole batch.
+    """
+    if not rag_pipeline:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    start_time = time.time()
+    outcomes = await rag_pipeline.aprocess_batch(request.queries)
+    
+    results = [
+        BatchQueryItem(index=i, error=str(outcome) or type(outcome).__name__)
+        if isinstance(outcome, Exception) else BatchQueryItem(index=i, response=outcome)
+        for i, outcome in enumerate(outcomes)
+    ]
+    return FastJSONResponse(BatchQueryResponse(results=results, processing_time=time.time() - start_time))
+
+
+def _format_sse(event: str, data) -> str:
+    """Format a single Server-Sent Event."""
+    if event == "sources":
+        data = [source.model_dump() for source in data]
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@app.post("/query/stream", tags=["RAG"])
+async def query_stream(request: QueryRequest):
+    """
+    Streaming RAG query endpoint (Server-Sent Events).
+    
+    Sends retrieved sources first, then answer tokens as they are generated.
+    """
+    if not rag_pipeline:
+        raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
+    
+    async def event_stream():
+        async for event, data in rag_pipeline.astream(request):
+            yield _format_sse(event, data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/filters", response_model=FilterOptions, tags=["Filters"])
-async def get_filters():
-    """Get available filter options."""
+async def get_filters(request: Request):
+    """Get available filter options (precomputed from the dataset snapshot)."""
     try:
-        loader = DataLoader(config.data_path)
-        filters = loader.load_filters()
-        
-        return FilterOptions(
-            cities=filters.get("cities", []),
-            categories=filters.get("categories", []),
-            ent_score_range=filters.get("ent_score_range", {"min": 50, "max": 100})
-        )
+        snapshot = get_dataset_store().get()
     except Exception as e:
         logger.error(f"Error loading filters: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    etag = f'"{snapshot.version[:16]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=snapshot.filters_json, media_type="application/json", headers={"ETag": etag})
 
 
 @app.post("/cache/clear", tags=["Cache"])
@@ -128,7 +248,7 @@ async def clear_cache():
     if not rag_pipeline:
         raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
     
-    rag_pipeline.clear_cache()
+    await rag_pipeline.aclear_cache()
     return {"message": "Cache cleared successfully"}
 
 
@@ -138,4 +258,17 @@ async def get_stats():
     if not rag_pipeline:
         raise HTTPException(status_code=503, detail="RAG pipeline not initialized")
     
-    return rag_pipeline.get_stats()
+    return FastJSONResponse(await rag_pipeline.aget_stats())
+
+
+@app.get("/metrics", tags=["Stats"])
+async def get_metrics():
+    """Prometheus metrics in text exposition format."""
+    if rag_pipeline:
+        CACHE_ENTRIES.set(len(rag_pipeline.cache), cache="response")
+        if rag_pipeline.semantic_cache is not None:
+            CACHE_ENTRIES.set(len(rag_pipeline.semantic_cache), cache="semantic")
+        LLM_QUEUE_DEPTH.set(rag_pipeline.llm_service.limiter.get_stats()["queue_depth"])
+        LLM_CIRCUIT_OPEN.set(int(rag_pipeline.llm_service.circuit.state != "closed"))
+    
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
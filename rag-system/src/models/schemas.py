@@ -1,6 +1,6 @@
 """Pydantic schemas for API."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Optional
 from datetime import datetime
 
@@ -11,6 +11,22 @@ class QueryRequest(BaseModel):
     filters: Optional[Dict] = Field(default=None, description="Optional filters (city, category, etc.)")
     top_k: Optional[int] = Field(default=None, ge=1, le=10, description="Number of results")
     temperature: Optional[float] = Field(default=0.7, ge=0, le=1, description="LLM temperature")
+    
+    @field_validator("filters")
+    @classmethod
+    def validate_scores(cls, filters: Optional[Dict]) -> Optional[Dict]:
+        """Reject non-numeric ENT score filters, so they fail with 422 instead of in the pipeline."""
+        if not filters:
+            return filters
+        for key in ("min_score", "max_score"):
+            value = filters.get(key)
+            if value in (None, ""):
+                continue
+            try:
+                filters[key] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be an integer, got {value!r}")
+        return filters
 
 
 class SourceDocument(BaseModel):
@@ -23,6 +39,7 @@ class SourceDocument(BaseModel):
     programs: str
     ent_score_range: str
     contact_info: Dict[str, str]
+    profile_subjects: str = ""
 
 
 class RAGResponse(BaseModel):
@@ -31,7 +48,29 @@ class RAGResponse(BaseModel):
     sources: List[SourceDocument]
     processing_time: float
     cached: bool = False
+    fallback: bool = Field(default=False, description="Answer built locally because the LLM was unavailable")
+    context_tokens: Optional[int] = Field(default=None, description="Estimated tokens of the packed LLM context")
     timestamp: datetime = Field(default_factory=datetime.now)
+    extracted_filters: Optional[Dict] = Field(default=None, description="Filters extracted from question text")
+    debug: Optional[Dict] = Field(default=None, description="Debug info (query plan), only in debug mode")
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for batch RAG query."""
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=50, description="Queries to answer")
+
+
+class BatchQueryItem(BaseModel):
+    """Result for one query of a batch."""
+    index: int
+    response: Optional[RAGResponse] = None
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch RAG query."""
+    results: List[BatchQueryItem]
+    processing_time: float
 
 
 class HealthCheck(BaseModel):
@@ -42,6 +81,7 @@ class HealthCheck(BaseModel):
     gemini_status: str
     cache_enabled: bool
     version: str = "1.0.0"
+    components: Optional[Dict] = Field(default=None, description="Last probe result per dependency")
 
 
 class FilterOptions(BaseModel):
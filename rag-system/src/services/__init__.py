@@ -1,3 +1,16 @@
+from .search_backends import SearchBackend, ChromaSearchBackend, NumpySearchBackend
+from .lexical_index import LexicalIndex
 from .vector_store import VectorStore
-from .llm_service import LLMService
+from .rate_limiter import TokenBucketLimiter, RateLimitExceeded
+from .circuit_breaker import CircuitBreaker
+from .fallback_generator import FallbackAnswerGenerator
+from .llm_backends import LLMBackend, GeminiBackend, StubLLMBackend, create_llm_backend
+from .llm_service import LLMService, LLMUnavailableError, LLMGenerationError
+from .cache import ResponseCache, SQLiteResponseCache, create_response_cache
+from .semantic_cache import SemanticCache
+from .context_packer import ContextPacker, PackedContext, estimate_tokens
+from .embedding_batcher import EmbeddingBatcher
+from .query_analyzer import QueryAnalyzer
+from .query_planner import QueryPlan, QueryPlanner
 from .rag_pipeline import RAGPipeline
+from .health_monitor import HealthMonitor
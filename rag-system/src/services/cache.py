@@ -0,0 +1,303 @@
+"""Response caches: bounded in-memory LRU and shared SQLite backend, both with TTL."""
+
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from src.config.config import config
+from src.models.schemas import RAGResponse
+from src.utils.logger import logger
+from src.utils.serialization import dumps
+
+
+# Fields that differ per request; cached bodies are stored without them
+REQUEST_FIELDS = {"cached", "processing_time"}
+
+
+def serialize_response(response: RAGResponse) -> bytes:
+    """Serialize response without per-request fields, for storing in a cache."""
+    return dumps(response.model_dump(exclude=REQUEST_FIELDS))
+
+
+def with_request_fields(body: bytes, cached: bool, processing_time: float) -> bytes:
+    """Complete a stored body with per-request fields without re-encoding it."""
+    prefix = b'{"cached":' + (b"true" if cached else b"false") + b',"processing_time":' + dumps(processing_time)
+    return prefix + b"," + body[1:] if len(body) > 2 else prefix + b"}"
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache for RAG responses with TTL expiration.
+    
+    Entries keep the serialized response too, so cache hits can be sent
+    without re-encoding the model.
+    """
+    
+    # Operations only touch memory and may run on the event loop
+    blocking = False
+    
+    def __init__(self, max_size: int = 1000, ttl: int = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        
+        # key -> (expires_at, response, serialized response)
+        self._entries: "OrderedDict[str, Tuple[float, RAGResponse, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+        logger.info(f"Response cache initialized (max_size={max_size}, ttl={ttl}s)")
+    
+    def _lookup(self, key: str) -> Optional[Tuple[float, RAGResponse, bytes]]:
+        """Get live entry for key, counting hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            if entry[0] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def get(self, key: str) -> Optional[RAGResponse]:
+        """Get a copy of cached response, or None if missing or expired."""
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        
+        # Callers get their own copy so the cached entry stays untouched
+        return entry[1].model_copy(deep=True)
+    
+    def get_json(self, key: str) -> Optional[bytes]:
+        """Get cached response serialized without per-request fields."""
+        entry = self._lookup(key)
+        return entry[2] if entry is not None else None
+    
+    def set(self, key: str, response: RAGResponse):
+        """Store a copy of response, evicting least recently used entries."""
+        if self.max_size <= 0:
+            return
+        
+        entry = (time.time() + self.ttl, response.model_copy(deep=True), serialize_response(response))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class SQLiteResponseCache:
+    """
+    Persistent response cache shared by all worker processes on a host.
+    
+    Uses SQLite in WAL mode so readers never block each other. Entries survive
+    restarts, which gives warm starts after a redeploy. Hits refresh the LRU
+    timestamp at most once per ``ACCESS_UPDATE_INTERVAL``, so reads rarely
+    take the write lock.
+    """
+    
+    # Operations may wait on the database lock; async callers use an executor
+    blocking = True
+    
+    ACCESS_UPDATE_INTERVAL = 60.0
+    
+    def __init__(self, db_path: str, max_size: int = 1000, ttl: int = 3600):
+        self.db_path = Path(db_path)
+        if not self.db_path.is_absolute():
+            self.db_path = Path(__file__).parent.parent.parent / db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.max_size = max_size
+        self.ttl = ttl
+        
+        # One connection per thread; SQLite handles cross-process locking
+        self._local = threading.local()
+        
+        # Counters (per process)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response_bodies (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_body_accessed ON response_bodies (accessed_at)")
+        conn.commit()
+        
+        logger.info(f"SQLite response cache at {self.db_path} ({len(self)} warm entries)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _lookup(self, key: str) -> Optional[bytes]:
+        """Get live serialized entry for key, counting hit or miss."""
+        try:
+            conn = self._connection()
+            now = time.time()
+            row = conn.execute(
+                "SELECT body, expires_at, accessed_at FROM response_bodies WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            payload, expires_at, accessed_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM response_bodies WHERE key = ?", (key,))
+                conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            if now - accessed_at > self.ACCESS_UPDATE_INTERVAL:
+                conn.execute("UPDATE response_bodies SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            self.hits += 1
+            return bytes(payload)
+        
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache read error: {e}")
+            self.misses += 1
+            return None
+    
+    def get(self, key: str) -> Optional[RAGResponse]:
+        """Get cached response, or None if missing or expired."""
+        body = self._lookup(key)
+        if body is None:
+            return None
+        return RAGResponse.model_validate_json(with_request_fields(body, False, 0.0))
+    
+    def get_json(self, key: str) -> Optional[bytes]:
+        """Get cached response serialized without per-request fields."""
+        return self._lookup(key)
+    
+    def set(self, key: str, response: RAGResponse):
+        """Store response, evicting least recently used entries."""
+        if self.max_size <= 0:
+            return
+        
+        try:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_bodies (key, body, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, serialize_response(response), now + self.ttl, now)
+            )
+            
+            expired = conn.execute("DELETE FROM response_bodies WHERE expires_at <= ?", (now,)).rowcount
+            self.expirations += max(expired, 0)
+            
+            overflow = len(self) - self.max_size
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM response_bodies WHERE key IN "
+                    "(SELECT key FROM response_bodies ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            
+            conn.commit()
+        
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache write error: {e}")
+    
+    def clear(self):
+        """Remove all entries (for all processes)."""
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM response_bodies")
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache clear error: {e}")
+    
+    def __len__(self) -> int:
+        try:
+            return self._connection().execute("SELECT COUNT(*) FROM response_bodies").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"SQLite cache count error: {e}")
+            return 0
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def create_response_cache() -> Union[ResponseCache, SQLiteResponseCache]:
+    """Create response cache for the configured backend."""
+    if config.cache_backend == "sqlite":
+        return SQLiteResponseCache(
+            db_path=config.cache_db_path,
+            max_size=config.cache_max_size,
+            ttl=config.cache_ttl
+        )
+    if config.cache_backend != "memory":
+        logger.warning(f"Unknown cache backend '{config.cache_backend}', using memory")
+    return ResponseCache(max_size=config.cache_max_size, ttl=config.cache_ttl)
@@ -0,0 +1,81 @@
+"""Circuit breaker for the external LLM API."""
+
+import time
+import threading
+from typing import Dict, Optional
+
+from src.utils.logger import logger
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing dependency for a while.
+    
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``recovery_timeout`` seconds. Then one trial call
+    is let through (half-open); success closes the circuit, failure reopens it.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self.last_error = ""
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may be attempted now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            # One trial per recovery period; a trial that never reached the
+            # dependency (e.g. rate limited) does not block the next one
+            now = time.monotonic()
+            if now - self.opened_at >= self.recovery_timeout:
+                if self.state == OPEN:
+                    logger.info("Circuit half-open, trying LLM again")
+                self.state = HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+    
+    def record_success(self):
+        """Record successful call."""
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuit closed, LLM recovered")
+            self.state = CLOSED
+            self.failures = 0
+            self.last_success_at = time.time()
+    
+    def record_failure(self, error: str = ""):
+        """Record failed call, opening the circuit past the threshold."""
+        with self._lock:
+            self.failures += 1
+            self.last_failure_at = time.time()
+            self.last_error = error
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+    
+    def get_stats(self) -> Dict:
+        """Get circuit statistics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened
+        }
@@ -0,0 +1,209 @@
+"""Token-budgeted packing of retrieved documents into LLM context."""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from src.utils.logger import logger
+
+
+# Gemini's SentencePiece vocabulary splits numbers into single digits and
+# keeps ~4 characters of a Cyrillic or Latin word per token
+_TOKEN_PIECES = re.compile(r"\d|[^\W\d_]+|[^\w\s]|_")
+
+# Fields removed before whole documents are dropped, least useful first.
+# Labels follow DataLoader._create_chunk_text.
+FIELD_DROP_ORDER = (
+    ("Контактная информация:", "- Телефон:", "- Email:", "- Адрес:"),
+    ("Тип:", "Направление:", "Уровни образования:"),
+)
+
+# Same order for compact lines, by metadata key
+COMPACT_DROP_ORDER = (
+    ("phone", "email", "address"),
+    ("type", "direction", "education_levels"),
+)
+
+# Values that carry no information for the LLM
+_EMPTY_VALUES = {"", "0", "-", "—", "не указан", "не указано", "не указана"}
+
+
+@lru_cache(maxsize=4096)
+def estimate_tokens(text: str) -> int:
+    """Estimate Gemini token count without calling the API."""
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        tokens += (len(piece) + 3) // 4 if piece[0].isalpha() else 1
+    return tokens
+
+
+def drop_fields(text: str, labels: Sequence[str]) -> str:
+    """Remove lines starting with any of the labels, collapsing blank lines."""
+    lines = [line for line in text.split("\n") if not line.strip().startswith(tuple(labels))]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+@lru_cache(maxsize=4096)
+def field_variants(text: str, drop_order: Tuple[Tuple[str, ...], ...] = FIELD_DROP_ORDER) -> Tuple[str, ...]:
+    """Document renderings from full to leanest, dropping field groups in order."""
+    variants = [text]
+    labels: List[str] = []
+    for group in drop_order:
+        labels.extend(group)
+        lean = drop_fields(text, labels)
+        if lean != variants[-1]:
+            variants.append(lean)
+    return tuple(variants)
+
+
+def _value(metadata: Dict, key: str) -> str:
+    value = str(metadata.get(key, "") or "").strip()
+    return "" if value.lower() in _EMPTY_VALUES else value
+
+
+def render_compact(metadata: Dict, drop: Sequence[str] = ()) -> str:
+    """
+    Render a university as one terse line from its metadata.
+    
+    Empty fields and placeholders are left out, repeated values (category
+    equal to direction, min equal to max score) are written once.
+    """
+    def value(key: str) -> str:
+        return "" if key in drop else _value(metadata, key)
+    
+    name, city = value("name"), value("city")
+    parts = [f"{name} — {city}" if city else name]
+    
+    areas = []
+    for key in ("category", "direction"):
+        area = value(key)
+        if area and area not in areas:
+            areas.append(area)
+    parts.extend([value("type"), " / ".join(areas)])
+    
+    programs, levels = value("programs"), value("education_levels")
+    parts.append(f"программы: {programs}" if programs else "")
+    parts.append(f"уровни: {levels}" if levels else "")
+    
+    low, high = value("ent_min_score"), value("ent_max_score")
+    if low and high and low != high:
+        parts.append(f"ЕНТ {low}-{high}")
+    elif low or high:
+        parts.append(f"ЕНТ {low or high}")
+    
+    subjects = value("profile_subjects")
+    parts.append(f"предметы: {subjects}" if subjects else "")
+    
+    contacts = [value(key) for key in ("phone", "email", "address")]
+    contacts = [contact for contact in contacts if contact]
+    parts.append(f"контакты: {', '.join(contacts)}" if contacts else "")
+    
+    return "; ".join(part for part in parts if part)
+
+
+def compact_variants(
+    metadata: Dict,
+    drop_order: Tuple[Tuple[str, ...], ...] = COMPACT_DROP_ORDER
+) -> Tuple[str, ...]:
+    """Compact renderings from full to leanest, dropping field groups in order."""
+    variants = [render_compact(metadata)]
+    keys: List[str] = []
+    for group in drop_order:
+        keys.extend(group)
+        lean = render_compact(metadata, keys)
+        if lean != variants[-1]:
+            variants.append(lean)
+    return tuple(variants)
+
+
+@dataclass
+class PackedContext:
+    """Packed context text with accounting."""
+    text: str
+    tokens: int
+    included: List[int] = field(default_factory=list)  # input indices, in order
+    trimmed: List[int] = field(default_factory=list)  # included with fields dropped
+
+
+class ContextPacker:
+    """
+    Pack documents (most relevant first) whole into a token budget.
+    
+    Each document comes as a list of renderings from full to leanest. The
+    packer first switches the least relevant documents to leaner renderings,
+    and only drops whole documents (least relevant first) when even the
+    leanest renderings do not fit. Documents are never cut mid-line; the most
+    relevant one is always kept.
+    
+    ``header`` (formatted with the 1-based position) and ``separator`` frame
+    the documents; compact mode uses numbered lines.
+    """
+    
+    SEPARATOR = "\n\n---\n\n"
+    HEADER = "[Университет {}]:\n"
+    COMPACT_SEPARATOR = "\n"
+    COMPACT_HEADER = "{}. "
+    
+    def __init__(
+        self,
+        max_tokens: int,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        compact: bool = False
+    ):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.compact = compact
+        self.separator = self.COMPACT_SEPARATOR if compact else self.SEPARATOR
+        self.header = self.COMPACT_HEADER if compact else self.HEADER
+        self._separator_tokens = count_tokens(self.separator)
+    
+    def _header(self, position: int) -> str:
+        return self.header.format(position)
+    
+    def _fit(self, sizes: List[List[int]], overhead: int) -> List[int]:
+        """Choose rendering level per document, degrading the least relevant first."""
+        levels = [0] * len(sizes)
+        total = overhead + sum(size[0] for size in sizes)
+        for i in reversed(range(len(sizes))):
+            while total > self.max_tokens and levels[i] < len(sizes[i]) - 1:
+                total -= sizes[i][levels[i]] - sizes[i][levels[i] + 1]
+                levels[i] += 1
+        return levels if total <= self.max_tokens else []
+    
+    def pack(self, documents: List[Sequence[str]]) -> PackedContext:
+        """Pack document renderings into context text."""
+        if not documents:
+            return PackedContext("", 0)
+        
+        # Header ends with whitespace, so its tokens add up with the body's
+        sizes = [
+            [self.count_tokens(self._header(i + 1)) + self.count_tokens(variant) for variant in variants]
+            for i, variants in enumerate(documents)
+        ]
+        
+        # Keep as many documents as fit, each as rich as the budget allows
+        count, levels = len(documents), []
+        while count > 0:
+            levels = self._fit(sizes[:count], self._separator_tokens * (count - 1))
+            if levels:
+                break
+            count -= 1
+        
+        if not levels:
+            count, levels = 1, [len(documents[0]) - 1]
+            logger.warning(f"Top document exceeds context budget of {self.max_tokens} tokens")
+        
+        parts = [self._header(i + 1) + documents[i][level] for i, level in enumerate(levels)]
+        text = self.separator.join(parts)
+        tokens = sum(sizes[i][level] for i, level in enumerate(levels)) + self._separator_tokens * (count - 1)
+        
+        if count < len(documents) or any(levels):
+            logger.debug(f"Context packed: {count}/{len(documents)} documents, {tokens} tokens")
+        
+        return PackedContext(
+            text=text,
+            tokens=tokens,
+            included=list(range(count)),
+            trimmed=[i for i, level in enumerate(levels) if level > 0]
+        )
@@ -0,0 +1,96 @@
+"""Micro-batching of concurrent query embeddings."""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.utils.logger import logger
+
+
+class EmbeddingBatcher:
+    """
+    Collect queries arriving within a short window and embed them in one call.
+    
+    A batch is flushed when ``max_batch_size`` queries are pending or
+    ``window_ms`` has passed since the first one arrived. Encoding runs in the
+    given executor; each caller gets back its own vector.
+    """
+    
+    def __init__(
+        self, 
+        encode_batch: Callable[[List[str]], List[List[float]]], 
+        executor: Executor, 
+        window_ms: float = 5.0, 
+        max_batch_size: int = 32
+    ):
+        self.encode_batch = encode_batch
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Counters
+        self.batches = 0
+        self.queries = 0
+        
+        logger.info(f"Embedding batcher initialized (window={window_ms}ms, max_batch={max_batch_size})")
+    
+    async def embed(self, query: str) -> List[float]:
+        """Embed a single query as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Send pending queries to the executor as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference so the task is not garbage collected mid-flight
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Encode a batch and route each vector back to its caller."""
+        texts = [query for query, _ in batch]
+        loop = asyncio.get_running_loop()
+        
+        try:
+            embeddings = await loop.run_in_executor(self.executor, self.encode_batch, texts)
+        except Exception as e:
+            logger.error(f"Batch embedding error: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.queries += len(batch)
+        
+        for (_, future), embedding in zip(batch, embeddings):
+            # Caller may have been cancelled while waiting
+            if not future.done():
+                future.set_result(embedding)
+    
+    def get_stats(self) -> Dict:
+        """Get batcher statistics."""
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending)
+        }
@@ -0,0 +1,117 @@
+"""Embedding model backends sharing the SentenceTransformer encode interface."""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import List, Union
+
+from src.utils.logger import logger
+
+
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_INFO_FILE = "export.json"
+
+
+class OnnxEmbeddingModel:
+    """
+    Quantized int8 ONNX export of a sentence-transformers model on CPU.
+    
+    Produced by ``scripts/export_onnx.py``. Uses mean pooling over the
+    attention mask, like paraphrase-multilingual-MiniLM-L12-v2. The model
+    is the one exported, not EMBEDDING_MODEL; a mismatch is logged.
+    """
+    
+    def __init__(self, model_dir: str, max_seq_length: int = 128, threads: int = 0, model_name: str = ""):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=onnx requires onnxruntime and transformers") from e
+        
+        self.model_dir = Path(model_dir)
+        if not self.model_dir.is_absolute():
+            self.model_dir = Path(__file__).parent.parent.parent / model_dir
+        
+        model_path = self.model_dir / ONNX_MODEL_FILE
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found: {model_path}. Run 'python scripts/export_onnx.py' first."
+            )
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+        self.max_seq_length = max_seq_length
+        
+        info_path = self.model_dir / ONNX_INFO_FILE
+        info = json.loads(info_path.read_text(encoding="utf-8")) if info_path.exists() else {}
+        self.model_name = info.get("embedding_model", "")
+        if model_name and self.model_name != model_name:
+            logger.warning(
+                f"ONNX model was exported from '{self.model_name or 'unknown model'}', "
+                f"not EMBEDDING_MODEL '{model_name}'; re-run scripts/export_onnx.py"
+            )
+        
+        logger.info(f"ONNX int8 embedding model loaded from {model_path}")
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts."""
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        inputs = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self.input_names and name in tokens
+        }
+        
+        token_embeddings = self.session.run(None, inputs)[0]
+        
+        # Mean pooling over non-padding tokens
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return summed / np.maximum(mask.sum(axis=1), 1e-9)
+    
+    def encode(
+        self, 
+        sentences: Union[str, List[str]], 
+        batch_size: int = 32, 
+        show_progress_bar: bool = False, 
+        **kwargs
+    ) -> np.ndarray:
+        """Embed a sentence or list of sentences (SentenceTransformer-compatible)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        
+        batches = [
+            self._encode_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        embeddings = np.concatenate(batches).astype(np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedding_model(model_name: str, backend: str = "torch", onnx_model_dir: str = ""):
+    """Load embedding model for the configured backend."""
+    if backend == "onnx":
+        return OnnxEmbeddingModel(onnx_model_dir, model_name=model_name)
+    
+    if backend != "torch":
+        logger.warning(f"Unknown embedding backend '{backend}', using torch")
+    
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
@@ -0,0 +1,108 @@
+"""Deterministic local answer generator used when the LLM is unavailable."""
+
+import re
+from typing import Dict, List, Optional
+
+from src.models.schemas import SourceDocument
+
+
+class FallbackAnswerGenerator:
+    """
+    Build a structured answer from retrieved sources without an LLM.
+    
+    Follows the section layout of SYSTEM_PROMPT so the client renders it the
+    same way as a Gemini answer.
+    """
+    
+    NOTICE = (
+        "_ℹ️ AI-консультант сейчас перегружен, поэтому это краткая автоматическая "
+        "подборка по базе университетов. Повторите вопрос позже для развернутой консультации._"
+    )
+    
+    @staticmethod
+    def _ent_range(source: SourceDocument):
+        """Parse 'min-max' ENT range into numbers."""
+        numbers = [int(n) for n in re.findall(r"\d+", source.ent_score_range)]
+        if not numbers:
+            return None, None
+        return numbers[0], numbers[-1]
+    
+    def _chances(self, source: SourceDocument, score: Optional[int]) -> str:
+        """Describe admission chances for the student's ENT score."""
+        low, high = self._ent_range(source)
+        if score is None or low is None:
+            return ""
+        if score >= high:
+            return " — ваш балл выше проходного, шансы высокие"
+        if score >= low:
+            return " — ваш балл в диапазоне проходных, шансы есть"
+        return " — ваш балл ниже проходного, рассмотрите платное обучение или подготовку"
+    
+    def _analysis(self, question: str, extracted: Dict) -> List[str]:
+        """Section 1: what we understood from the question."""
+        facts = []
+        if extracted.get("min_score"):
+            facts.append(f"балл ЕНТ: {extracted['min_score']}")
+        if extracted.get("city"):
+            facts.append(f"город: {extracted['city']}")
+        if extracted.get("category"):
+            category = extracted["category"]
+            facts.append(f"направление: {category[0] if isinstance(category, list) else category}")
+        
+        summary = "; ".join(facts) if facts else "параметры не указаны, подборка по общему запросу"
+        return [
+            "1. 📊 **Анализ ситуации студента**",
+            f"   Запрос: «{question.strip()}». Учтено — {summary}.",
+        ]
+    
+    def _recommendation(self, index: int, source: SourceDocument, score: Optional[int]) -> List[str]:
+        """One university block of section 2."""
+        contacts = ", ".join(v for v in source.contact_info.values() if v)
+        lines = [
+            f"   {index}. 🏛️ **{source.name}** ({source.city}) — {source.programs or 'программы уточняйте'}",
+            f"      - ✅ Почему подходит: направление «{source.category}», город {source.city}",
+            f"      - 📋 Баллы ЕНТ: {source.ent_score_range}{self._chances(source, score)}",
+        ]
+        if source.profile_subjects:
+            lines.append(f"      - 📚 Профильные предметы: {source.profile_subjects}")
+        if contacts:
+            lines.append(f"      - 📞 Контакты: {contacts}")
+        return lines
+    
+    def generate(
+        self, 
+        question: str, 
+        sources: List[SourceDocument], 
+        extracted: Optional[Dict] = None
+    ) -> str:
+        """Build the answer text."""
+        extracted = extracted or {}
+        score = extracted.get("min_score")
+        ranked = sorted(sources, key=lambda s: s.relevance_score, reverse=True)
+        top, alternatives = ranked[:3], ranked[3:5]
+        
+        lines = [self.NOTICE, ""]
+        lines += self._analysis(question, extracted)
+        
+        lines += ["", "2. 🎯 **Топ-3 рекомендации с обоснованием:**"]
+        for i, source in enumerate(top, 1):
+            lines += self._recommendation(i, source, score)
+        
+        lines += ["", "3. 🔄 **Альтернативные варианты**"]
+        if alternatives:
+            for source in alternatives:
+                lines.append(f"   - {source.name} ({source.city}), ЕНТ {source.ent_score_range}")
+        else:
+            lines.append("   - Уточните город или направление, чтобы расширить подборку")
+        
+        lines += [
+            "",
+            "4. 📝 **Конкретный план действий**",
+            "   1) Сверьте проходные баллы и профильные предметы на сайте приёмной комиссии",
+            "   2) Свяжитесь с университетами по контактам выше и уточните стоимость обучения",
+            "   3) Подготовьте документы и подайте заявление на грант в установленные сроки",
+            "",
+            "5. 💪 **Мотивационное заключение**",
+            "   У вас есть несколько реальных вариантов — выбирайте осознанно, и всё получится!",
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,184 @@
+"""Background health monitor with cached component status."""
+
+import time
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+from src.services.llm_service import LLMService
+from src.services.vector_store import VectorStore
+from src.utils.logger import logger
+
+
+@dataclass
+class ComponentHealth:
+    """Last known status of one dependency."""
+    status: str = "unknown"  # unknown | ok | error
+    detail: str = ""
+    checked_at: Optional[float] = None
+    latency: Optional[float] = None
+    source: str = ""  # probe | passive
+
+
+class HealthMonitor:
+    """
+    Probe dependencies on a schedule so /health can answer from memory.
+    
+    Vector store and embedding model are probed every ``interval`` seconds.
+    Gemini status is taken from real request outcomes (recorded by the LLM
+    circuit breaker); a live Gemini call is made only when there was no
+    request within ``llm_probe_interval`` or when a deep check is forced,
+    and only with spare rate limiter quota.
+    """
+    
+    def __init__(
+        self,
+        llm_service: LLMService,
+        vector_store: VectorStore,
+        executor: Executor,
+        interval: float = 30.0,
+        llm_probe_interval: float = 300.0,
+        probe_timeout: float = 10.0
+    ):
+        self.llm_service = llm_service
+        self.vector_store = vector_store
+        self.executor = executor
+        self.interval = interval
+        self.llm_probe_interval = llm_probe_interval
+        self.probe_timeout = probe_timeout
+        
+        self.components: Dict[str, ComponentHealth] = {
+            "gemini": ComponentHealth(),
+            "vector_store": ComponentHealth(),
+            "embedding_model": ComponentHealth(),
+        }
+        self.vector_db_count = 0
+        self.llm_probes = 0
+        self._last_llm_probe = 0.0
+        self._task: Optional[asyncio.Task] = None
+        
+        logger.info(f"Health monitor initialized (interval={interval}s, llm_probe_interval={llm_probe_interval}s)")
+    
+    async def start(self):
+        """Check local components once, then keep probing in the background."""
+        await self._check_local()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """Probe loop."""
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Health check failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    async def _probe(self, name: str, func, *args):
+        """Run a blocking probe in the executor and record its outcome."""
+        loop = asyncio.get_running_loop()
+        start = time.time()
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, func, *args), timeout=self.probe_timeout
+            )
+            self.components[name] = ComponentHealth("ok", "", time.time(), time.time() - start, "probe")
+            return result
+        except Exception as e:
+            detail = str(e) or repr(e)
+            logger.warning(f"Health probe '{name}' failed: {detail}")
+            self.components[name] = ComponentHealth("error", detail, time.time(), time.time() - start, "probe")
+            return None
+    
+    async def _check_local(self):
+        """Probe vector store and embedding model."""
+        count = await self._probe("vector_store", self.vector_store.get_document_count)
+        if count is not None:
+            self.vector_db_count = count
+        await self._probe("embedding_model", self.vector_store.embed_query, "health check")
+    
+    def _passive_llm_status(self) -> Optional[ComponentHealth]:
+        """Gemini status from recent real requests, if there were any."""
+        circuit = self.llm_service.circuit
+        last_success = circuit.last_success_at or 0.0
+        last_failure = circuit.last_failure_at or 0.0
+        last = max(last_success, last_failure)
+        if not last or time.time() - last > self.llm_probe_interval:
+            return None
+        
+        if circuit.state != "closed" or last_failure > last_success:
+            return ComponentHealth("error", circuit.last_error or f"circuit {circuit.state}", last, None, "passive")
+        return ComponentHealth("ok", "", last, None, "passive")
+    
+    async def _check_llm(self, force: bool = False):
+        """Refresh Gemini status, calling the API only if needed."""
+        passive = None if force else self._passive_llm_status()
+        if passive is not None:
+            self.components["gemini"] = passive
+            return
+        
+        if not force and time.time() - self._last_llm_probe < self.llm_probe_interval:
+            return
+        
+        self._last_llm_probe = time.time()
+        self.llm_probes += 1
+        start = time.time()
+        try:
+            status = await asyncio.wait_for(self.llm_service.acheck_health(), timeout=self.probe_timeout)
+        except asyncio.TimeoutError:
+            # The cancelled probe may have been the half-open trial
+            self.llm_service.circuit.record_failure("health probe timeout")
+            status = "error: timeout"
+        
+        if status is None:
+            logger.debug("Gemini probe skipped, no free rate limiter token")
+            return
+        
+        ok = status == "connected"
+        self.components["gemini"] = ComponentHealth(
+            "ok" if ok else "error", "" if ok else status, time.time(), time.time() - start, "probe"
+        )
+    
+    async def check(self, deep: bool = False) -> Dict:
+        """Refresh component status; ``deep`` forces a live Gemini call."""
+        await self._check_local()
+        await self._check_llm(force=deep)
+        return self.get_status()
+    
+    @property
+    def gemini_status(self) -> str:
+        """Gemini status in the /health format."""
+        gemini = self.components["gemini"]
+        if gemini.status == "ok":
+            return "connected"
+        if gemini.status == "unknown":
+            return "unknown"
+        return f"error: {gemini.detail}"
+    
+    @property
+    def status(self) -> str:
+        """Overall status: healthy, degraded (LLM issues) or unhealthy."""
+        local = (self.components["vector_store"].status, self.components["embedding_model"].status)
+        if "error" in local:
+            return "unhealthy"
+        if self.components["gemini"].status == "ok":
+            return "healthy"
+        return "degraded"
+    
+    def get_status(self) -> Dict:
+        """Get cached status of all components."""
+        return {
+            "status": self.status,
+            "components": {name: asdict(c) for name, c in self.components.items()},
+            "llm_probes": self.llm_probes
+        }
@@ -0,0 +1,122 @@
+"""Read-only index snapshot that worker processes memory-map instead of opening ChromaDB."""
+
+import os
+import json
+import time
+import hashlib
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from src.utils.logger import logger
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """Documents and metadata with a memory-mapped float32 embedding matrix."""
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict]
+    embeddings: np.ndarray
+    space: str
+    embedding_model: str
+    version: str
+
+
+def resolve_snapshot_path(path: Union[str, Path]) -> Path:
+    """Resolve snapshot directory relative to the rag-system directory."""
+    path = Path(path)
+    if not path.is_absolute():
+        path = Path(__file__).parent.parent.parent / path
+    return path
+
+
+def _atomic_write(path: Path, write):
+    """Write via a temporary file and rename, so readers never see partial files."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def write_index_snapshot(
+    path: Union[str, Path],
+    ids: List[str],
+    embeddings,
+    documents: List[str],
+    metadatas: List[Dict],
+    space: str = "l2",
+    embedding_model: str = ""
+) -> str:
+    """
+    Write snapshot files and return the snapshot version.
+    
+    Data files carry the version in their names and the manifest pointing
+    to them is replaced last, so a worker starting during a rewrite loads
+    either the old or the new snapshot. Files of older versions are removed;
+    workers that already mapped them keep reading until they restart.
+    """
+    directory = resolve_snapshot_path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    
+    matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+    payload = json.dumps(
+        {"ids": list(ids), "documents": list(documents), "metadatas": list(metadatas)},
+        ensure_ascii=False,
+        sort_keys=True  # stable version for the same data
+    ).encode("utf-8")
+    version = hashlib.sha256(matrix.tobytes() + payload + embedding_model.encode()).hexdigest()[:16]
+    
+    embeddings_file = f"embeddings.{version}.npy"
+    documents_file = f"documents.{version}.json"
+    _atomic_write(directory / embeddings_file, lambda f: np.save(f, matrix))
+    _atomic_write(directory / documents_file, lambda f: f.write(payload))
+    
+    manifest = {
+        "version": version,
+        "count": len(ids),
+        "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "space": space,
+        "embedding_model": embedding_model,
+        "embeddings": embeddings_file,
+        "documents": documents_file,
+        "created_at": time.time()
+    }
+    _atomic_write(directory / MANIFEST_FILE, lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+    
+    for old in list(directory.glob("embeddings.*.npy")) + list(directory.glob("documents.*.json")):
+        if old.name not in (embeddings_file, documents_file):
+            old.unlink(missing_ok=True)
+    
+    logger.info(f"Index snapshot {version} written to {directory} ({len(ids)} documents)")
+    return version
+
+
+def load_index_snapshot(path: Union[str, Path]) -> Optional[IndexSnapshot]:
+    """Map snapshot read-only, None if no snapshot was written."""
+    directory = resolve_snapshot_path(path)
+    manifest_path = directory / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    
+    # Pages are shared through the OS page cache by every process mapping the file
+    embeddings = np.load(directory / manifest["embeddings"], mmap_mode="r" if manifest["count"] else None)
+    data = json.loads((directory / manifest["documents"]).read_text(encoding="utf-8"))
+    if embeddings.shape[0] != len(data["ids"]):
+        raise ValueError(f"Index snapshot {manifest['version']} is inconsistent")
+    
+    return IndexSnapshot(
+        ids=data["ids"],
+        documents=data["documents"],
+        metadatas=data["metadatas"],
+        embeddings=embeddings,
+        space=manifest.get("space", "l2"),
+        embedding_model=manifest.get("embedding_model", ""),
+        version=manifest["version"]
+    )
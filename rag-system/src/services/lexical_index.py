@@ -0,0 +1,149 @@
+"""BM25 lexical index with Russian/Kazakh-aware tokenization."""
+
+import re
+import math
+import numpy as np
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.services.search_backends import FilterColumns
+from src.utils.logger import logger
+
+
+# Program codes (B084, M094, D001) and ranges like "B084-B089"
+CODE_RANGE_RE = re.compile(r"\b([a-zа-я])(\d{3})\s*-\s*\1?(\d{3})\b", re.IGNORECASE)
+CODE_RE = re.compile(r"^[a-zа-я]\d{3}$")
+
+# Cyrillic (incl. Kazakh letters), Latin and digits
+TOKEN_RE = re.compile(r"[0-9a-zа-яёәғқңөұүһі]+", re.IGNORECASE)
+
+# Latin look-alikes typed instead of Cyrillic in codes (В084 -> b084)
+CODE_LETTERS = str.maketrans({"в": "b", "м": "m", "д": "d"})
+
+# Russian inflection endings, longest first
+ENDINGS = sorted([
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ых", "их", "ой", "ей",
+    "ий", "ый", "ая", "яя", "ое", "ее", "ую", "юю", "ам", "ям", "ах", "ях", "ом", "ем",
+    "ов", "ев", "ия", "ие", "ии", "ию", "ью", "ы", "и", "а", "я", "о", "е", "у", "ю", "ь"
+], key=len, reverse=True)
+
+STOP_WORDS = {
+    "в", "во", "на", "и", "или", "с", "со", "по", "для", "от", "до", "из", "к", "о", "об",
+    "а", "но", "не", "что", "как", "где", "какой", "какие", "мне", "меня", "у", "я", "хочу",
+    "им", "имени", "the", "of", "and"
+}
+
+MIN_STEM_LENGTH = 4
+
+
+def stem(word: str) -> str:
+    """Strip a Russian inflection ending, keeping at least MIN_STEM_LENGTH letters."""
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def _expand_code_ranges(text: str) -> str:
+    """Append every code covered by ranges like B084-B089."""
+    extra = []
+    for match in CODE_RANGE_RE.finditer(text):
+        letter, start, end = match.group(1), int(match.group(2)), int(match.group(3))
+        if 0 < end - start <= 50:
+            extra.extend(f"{letter}{number:03d}" for number in range(start, end + 1))
+    return text + " " + " ".join(extra) if extra else text
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split and stem text; program codes are kept intact."""
+    text = _expand_code_ranges(text.lower().replace("ё", "е"))
+    
+    tokens = []
+    for token in TOKEN_RE.findall(text):
+        if token in STOP_WORDS:
+            continue
+        code = token.translate(CODE_LETTERS)
+        if CODE_RE.match(code):
+            tokens.append(code)
+        elif token.isdigit():
+            tokens.append(token)
+        else:
+            tokens.append(stem(token))
+    return tokens
+
+
+def name_acronyms(name: str) -> List[str]:
+    """Acronyms for a university name, e.g. КБТУ, КазНУ."""
+    # Honorific part ("им. аль-Фараби") is not part of common abbreviations
+    name = re.split(r"\bим(?:ени|\.)", name, maxsplit=1)[0]
+    words = [w for w in re.split(r"[\s\-()«»\"]+", name.lower()) if w and w[0].isalpha()]
+    if len(words) < 2:
+        return []
+    
+    initials = "".join(w[0] for w in words)
+    return [initials, words[0][:3] + "".join(w[0] for w in words[1:])]
+
+
+class LexicalIndex:
+    """Inverted index with BM25 scoring over chunk texts."""
+    
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.k1 = k1
+        self.b = b
+        
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths = np.zeros(len(self.ids), dtype=np.float32)
+        
+        for i, (text, metadata) in enumerate(zip(self.documents, self.metadatas)):
+            tokens = tokenize(text or "") + [stem(a) for a in name_acronyms(metadata.get("name", ""))]
+            self.doc_lengths[i] = len(tokens)
+            for token, tf in Counter(tokens).items():
+                self.postings[token].append((i, tf))
+        
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.ids) else 0.0
+        n = len(self.ids)
+        self.idf = {
+            token: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self.postings.items()
+        }
+        self.columns = FilterColumns(self.metadatas)
+        
+        logger.info(f"Lexical index built: {n} documents, {len(self.postings)} terms")
+    
+    @classmethod
+    def from_collection(cls, collection) -> "LexicalIndex":
+        """Build index from all documents in a ChromaDB collection."""
+        data = collection.get(include=["documents", "metadatas"])
+        return cls(data["ids"], data["documents"], data["metadatas"])
+    
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for query."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self.idf[token]
+            for i, tf in postings:
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm[i])
+        return scores
+    
+    def search(self, query: str, top_k: int, filters: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """Top-k (document index, score) pairs with positive score."""
+        scores = self.scores(query)
+        
+        mask = self.columns.mask(filters)
+        if mask is not None:
+            scores[~mask] = 0.0
+        
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size == 0:
+            return []
+        
+        order = candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
+        return [(int(i), float(scores[i])) for i in order]
@@ -0,0 +1,247 @@
+"""LLM backends used by LLMService: Gemini and a local stub for offline runs."""
+
+import time
+import random
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from src.config.config import config
+from src.services.context_packer import estimate_tokens
+from src.utils.logger import logger
+
+
+GEMINI_MODEL = "gemini-1.5-flash"
+
+
+@dataclass
+class LLMUsage:
+    """Token usage of one call."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass
+class LLMResponse:
+    """Generated text with token usage, if the backend reports it."""
+    text: str
+    usage: Optional[LLMUsage] = None
+
+
+class LLMStream:
+    """Async iterator over answer text chunks; ``usage`` is set once it is exhausted."""
+    
+    def __init__(self):
+        self.usage: Optional[LLMUsage] = None
+        self._chunks: Optional[AsyncIterator[str]] = None
+    
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._chunks
+
+
+class LLMBackend(ABC):
+    """Interface of a text generation backend."""
+    
+    name = "base"
+    
+    @abstractmethod
+    def generate(self, prompt: str) -> LLMResponse:
+        """Generate answer (blocking)."""
+    
+    @abstractmethod
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        """Generate answer."""
+    
+    @abstractmethod
+    async def astream(self, prompt: str) -> LLMStream:
+        """Start generation; returns once the backend accepted the request."""
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via google-generativeai."""
+    
+    name = "gemini"
+    
+    def __init__(self, api_key: str, model_name: str = GEMINI_MODEL):
+        if not api_key or api_key == "your_gemini_api_key_here":
+            raise ValueError("Valid Gemini API key is required")
+        
+        import google.generativeai as genai
+        
+        genai.configure(api_key=api_key)
+        
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config={
+                "temperature": 0.7,
+                "top_p": 0.95,
+                "top_k": 40,
+                "max_output_tokens": 2048,
+            },
+            safety_settings=[
+                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+            ]
+        )
+    
+    @staticmethod
+    def _usage(response) -> Optional[LLMUsage]:
+        """Token usage from Gemini usage_metadata, None if missing."""
+        try:
+            usage = response.usage_metadata
+            return LLMUsage(
+                prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+                completion_tokens=getattr(usage, "candidates_token_count", 0) or 0
+            )
+        except Exception:
+            return None
+    
+    def generate(self, prompt: str) -> LLMResponse:
+        response = self.model.generate_content(prompt)
+        return LLMResponse(response.text, self._usage(response))
+    
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        response = await self.model.generate_content_async(prompt)
+        return LLMResponse(response.text, self._usage(response))
+    
+    async def astream(self, prompt: str) -> LLMStream:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        stream = LLMStream()
+        
+        async def chunks():
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+            stream.usage = self._usage(response)
+        
+        stream._chunks = chunks()
+        return stream
+
+
+class StubLLMError(Exception):
+    """Failure injected by StubLLMBackend."""
+
+
+class StubLLMBackend(LLMBackend):
+    """
+    Local stand-in for Gemini with realistic timing, for offline benchmarks.
+    
+    Each call waits ``latency`` seconds (± ``jitter`` fraction) before the
+    first token, then produces ``completion_tokens`` tokens at
+    ``tokens_per_second``. A ``failure_rate`` share of calls raises
+    StubLLMError after the first-token wait. Random choices come from a
+    seeded generator, so runs are repeatable.
+    """
+    
+    name = "stub"
+    
+    SENTENCE = "Это ответ локальной заглушки LLM для проверки производительности. "
+    CHUNK_TOKENS = 16
+    
+    def __init__(
+        self,
+        latency: float = 0.8,
+        tokens_per_second: float = 150.0,
+        completion_tokens: int = 500,
+        failure_rate: float = 0.0,
+        jitter: float = 0.2,
+        seed: int = 42
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        
+        repeats = max(1, completion_tokens // estimate_tokens(self.SENTENCE))
+        self._text = ("[stub] " + self.SENTENCE * repeats).strip()
+        self._chunks = self._split(self._text)
+        self.calls = 0
+        self.failures = 0
+        
+        logger.info(
+            f"Stub LLM backend: latency={latency}s, {tokens_per_second} tokens/s, "
+            f"{completion_tokens} tokens, failure_rate={failure_rate}"
+        )
+    
+    def _split(self, text: str):
+        """Split answer into chunks of about CHUNK_TOKENS tokens."""
+        words, chunks, current = text.split(" "), [], []
+        for word in words:
+            current.append(word)
+            if estimate_tokens(" ".join(current)) >= self.CHUNK_TOKENS:
+                chunks.append(" ".join(current) + " ")
+                current = []
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+    
+    def _start(self, prompt: str):
+        """Draw first-token delay and failure for one call."""
+        self.calls += 1
+        delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+        failed = self._random.random() < self.failure_rate
+        if failed:
+            self.failures += 1
+        usage = LLMUsage(estimate_tokens(prompt), estimate_tokens(self._text))
+        return max(0.0, delay), failed, usage
+    
+    def _generation_time(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+    
+    def generate(self, prompt: str) -> LLMResponse:
+        delay, failed, usage = self._start(prompt)
+        time.sleep(delay)
+        if failed:
+            raise StubLLMError("injected stub LLM failure")
+        time.sleep(self._generation_time(usage.completion_tokens))
+        return LLMResponse(self._text, usage)
+    
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        delay, failed, usage = self._start(prompt)
+        await asyncio.sleep(delay)
+        if failed:
+            raise StubLLMError("injected stub LLM failure")
+        await asyncio.sleep(self._generation_time(usage.completion_tokens))
+        return LLMResponse(self._text, usage)
+    
+    async def astream(self, prompt: str) -> LLMStream:
+        delay, failed, usage = self._start(prompt)
+        await asyncio.sleep(delay)
+        if failed:
+            raise StubLLMError("injected stub LLM failure")
+        stream = LLMStream()
+        
+        async def chunks():
+            for chunk in self._chunks:
+                await asyncio.sleep(self._generation_time(estimate_tokens(chunk)))
+                yield chunk
+            stream.usage = usage
+        
+        stream._chunks = chunks()
+        return stream
+
+
+def create_llm_backend(backend: str = "gemini", api_key: str = "") -> LLMBackend:
+    """Create LLM backend by name (stub settings come from config)."""
+    if backend == "stub":
+        return StubLLMBackend(
+            latency=config.stub_llm_latency,
+            tokens_per_second=config.stub_llm_tokens_per_second,
+            completion_tokens=config.stub_llm_completion_tokens,
+            failure_rate=config.stub_llm_failure_rate,
+            jitter=config.stub_llm_jitter,
+            seed=config.stub_llm_seed
+        )
+    
+    if backend != "gemini":
+        logger.warning(f"Unknown LLM backend '{backend}', using gemini")
+    return GeminiBackend(api_key)
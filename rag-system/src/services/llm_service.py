@@ -1,10 +1,19 @@
-"""Gemini LLM service with career counselor persona."""
+"""LLM service with career counselor persona."""
 
-import google.generativeai as genai
-from typing import Tuple, Optional
+import time
+import asyncio
+from typing import AsyncIterator, Dict, List, Tuple, Optional
 
 from src.config.config import config
+from src.models.schemas import SourceDocument
+from src.services.rate_limiter import (
+    TokenBucketLimiter, RateLimitExceeded, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+)
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.fallback_generator import FallbackAnswerGenerator
+from src.services.llm_backends import LLMBackend, LLMResponse, LLMUsage, create_llm_backend
 from src.utils.logger import logger
+from src.utils.metrics import STAGE_SECONDS, LLM_INFLIGHT, LLM_TOKENS, LLM_FALLBACKS, ERRORS
 
 
 # System prompt for career counselor persona
@@ -43,45 +52,66 @@ SYSTEM_PROMPT = """
 Если информации недостаточно для полного ответа, честно скажи об этом и предложи уточнить вопрос.
 """
 
+# Same persona and answer structure in fewer tokens (SHORT_SYSTEM_PROMPT=true)
+SYSTEM_PROMPT_SHORT = """
+Ты — профориентолог Казахстана. Пиши по-русски, эмпатично и конкретно, с цифрами и эмодзи.
+
+Структура ответа:
+1. 📊 **Анализ ситуации студента**
+2. 🎯 **Топ-3 рекомендации с обоснованием:** 🏛️ университет + специальность, ✅ почему подходит, 📋 баллы ЕНТ, предметы и шансы, 💰 стоимость (если известна)
+3. 🔄 **Альтернативные варианты** (1-2)
+4. 📝 **Конкретный план действий**
+5. 💪 **Мотивационное заключение**
+
+Если информации недостаточно, честно скажи об этом и предложи уточнить вопрос.
+"""
+
+
+# Answer text shown when generation failed and no fallback answer is used
+ERROR_ANSWER = "Извините, произошла ошибка при генерации ответа: {}"
+
+
+class LLMUnavailableError(Exception):
+    """LLM cannot answer in time; the caller should use the fallback answer."""
+
+
+class LLMGenerationError(Exception):
+    """LLM call failed; the caller shows ERROR_ANSWER and must not cache it."""
+
 
 class LLMService:
-    """Gemini LLM service for generating responses."""
+    """LLM service for generating responses (Gemini or local stub backend)."""
     
-    def __init__(self, api_key: str):
-        if not api_key or api_key == "your_gemini_api_key_here":
-            raise ValueError("Valid Gemini API key is required")
-        
-        genai.configure(api_key=api_key)
-        
-        # Configure model
-        self.model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            },
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+    def __init__(self, api_key: str = "", backend: Optional[LLMBackend] = None):
+        self.backend = backend or create_llm_backend(config.llm_backend, api_key)
+        
+        # Admission control for async calls, sized from the Gemini quota;
+        # every worker process has its own bucket with a share of it
+        workers = max(1, config.workers)
+        self.limiter = TokenBucketLimiter(
+            rate_per_minute=config.max_requests_per_minute / workers,
+            burst=max(1, config.llm_burst_size // workers),
+            max_queue_size=config.llm_queue_size,
+            timeout=config.llm_queue_timeout
         )
         
-        logger.info("Gemini LLM service initialized")
+        # Local answers when Gemini is slow, failing or out of quota
+        self.circuit = CircuitBreaker(
+            failure_threshold=config.circuit_failure_threshold,
+            recovery_timeout=config.circuit_recovery_timeout
+        )
+        self.fallback: Optional[FallbackAnswerGenerator] = None
+        if config.enable_fallback:
+            self.fallback = FallbackAnswerGenerator()
+        self.fallback_answers = 0
+        
+        self.system_prompt = SYSTEM_PROMPT_SHORT if config.short_system_prompt else SYSTEM_PROMPT
+        
+        logger.info(f"LLM service initialized (backend: {self.backend.name})")
     
-    def generate_answer(
-        self, 
-        question: str, 
-        context: str, 
-        temperature: float = 0.7
-    ) -> Tuple[str, Optional[int]]:
-        """Generate answer based on context."""
-        try:
-            # Build prompt
-            prompt = f"""{SYSTEM_PROMPT}
+    def _build_prompt(self, question: str, context: str) -> str:
+        """Build full prompt from system prompt, context and question."""
+        return f"""{self.system_prompt}
 
 ---
 
@@ -98,32 +128,190 @@ class LLMService:
 Дай развернутый ответ, используя ТОЛЬКО информацию из контекста выше.
 Если в контексте нет нужной информации, честно скажи об этом.
 """
-            
-            # Generate response
-            response = self.model.generate_content(prompt)
-            
-            answer = response.text
-            tokens_used = None
-            
-            # Try to get token count
-            try:
-                if hasattr(response, 'usage_metadata'):
-                    tokens_used = response.usage_metadata.total_token_count
-            except:
-                pass
-            
-            logger.info(f"Generated response ({len(answer)} chars)")
-            return answer, tokens_used
-            
+    
+    def _record_usage(self, usage: Optional[LLMUsage]) -> Optional[int]:
+        """Count prompt and completion tokens, return the total."""
+        if usage is None:
+            return None
+        for kind, count in (("prompt", usage.prompt_tokens), ("completion", usage.completion_tokens)):
+            if count:
+                LLM_TOKENS.inc(count, type=kind)
+        return usage.total_tokens
+    
+    def _parse_response(self, response: LLMResponse) -> Tuple[str, Optional[int]]:
+        """Extract answer text and token count from backend response."""
+        answer = response.text
+        tokens_used = self._record_usage(response.usage)
+        
+        logger.info(f"Generated response ({len(answer)} chars)")
+        return answer, tokens_used
+    
+    def generate_answer(
+        self, 
+        question: str, 
+        context: str, 
+        temperature: float = 0.7
+    ) -> Tuple[str, Optional[int]]:
+        """Generate answer based on context."""
+        try:
+            prompt = self._build_prompt(question, context)
+            with LLM_INFLIGHT.track(), STAGE_SECONDS.time(stage="llm"):
+                response = self.backend.generate(prompt)
+            self.circuit.record_success()
+            return self._parse_response(response)
+        
         except Exception as e:
+            self.circuit.record_failure(str(e))
+            ERRORS.inc(component="llm", type=type(e).__name__)
             logger.error(f"LLM generation error: {e}")
-            return f"Извините, произошла ошибка при генерации ответа: {str(e)}", None
+            raise LLMGenerationError(str(e)) from e
+    
+    async def _admit(self, priority: int) -> Optional[float]:
+        """
+        Pass circuit breaker and rate limiter before calling Gemini.
+        
+        Returns the time left until the latency deadline (None when fallback
+        is disabled and calls may take as long as Gemini needs).
+        """
+        if self.fallback is None:
+            with STAGE_SECONDS.time(stage="llm_queue"):
+                await self.limiter.acquire(priority)
+            return None
+        
+        if not self.circuit.allow():
+            raise LLMUnavailableError("circuit open")
+        
+        start = time.monotonic()
+        try:
+            with STAGE_SECONDS.time(stage="llm_queue"):
+                await self.limiter.acquire(priority, timeout=config.llm_deadline)
+        except RateLimitExceeded as e:
+            raise LLMUnavailableError(str(e)) from e
+        return max(0.1, config.llm_deadline - (time.monotonic() - start))
+    
+    async def agenerate_answer(
+        self, 
+        question: str, 
+        context: str, 
+        temperature: float = 0.7, 
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> Tuple[str, Optional[int]]:
+        """
+        Generate answer based on context without blocking the event loop.
+        
+        Waits for rate limiter admission first. With fallback enabled, a
+        request not admitted before the deadline raises LLMUnavailableError
+        like a failed call; otherwise it raises RateLimitExceeded (answered
+        with HTTP 429) and a failed call raises LLMGenerationError.
+        """
+        remaining = await self._admit(priority)
+        
+        try:
+            prompt = self._build_prompt(question, context)
+            with LLM_INFLIGHT.track(), STAGE_SECONDS.time(stage="llm"):
+                response = await asyncio.wait_for(
+                    self.backend.agenerate(prompt), timeout=remaining
+                )
+            self.circuit.record_success()
+            return self._parse_response(response)
+        
+        except Exception as e:
+            self.circuit.record_failure(str(e) or repr(e))
+            ERRORS.inc(component="llm", type=type(e).__name__)
+            logger.error(f"LLM generation error: {e!r}")
+            if self.fallback is not None:
+                raise LLMUnavailableError(repr(e)) from e
+            raise LLMGenerationError(str(e)) from e
+    
+    async def astream_answer(
+        self, 
+        question: str, 
+        context: str, 
+        temperature: float = 0.7, 
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """
+        Stream answer text chunks as the LLM produces them (rate limited).
+        
+        With fallback enabled, raises LLMUnavailableError if nothing was
+        streamed yet; the deadline applies to the first chunk. Other failures
+        raise LLMGenerationError after the chunks streamed so far.
+        """
+        remaining = await self._admit(priority)
+        streamed = False
+        
+        try:
+            prompt = self._build_prompt(question, context)
+            with LLM_INFLIGHT.track(), STAGE_SECONDS.time(stage="llm"):
+                stream = await asyncio.wait_for(
+                    self.backend.astream(prompt), timeout=remaining
+                )
+                async for chunk in stream:
+                    streamed = True
+                    yield chunk
+            self.circuit.record_success()
+            self._record_usage(stream.usage)
+        
+        except Exception as e:
+            self.circuit.record_failure(str(e) or repr(e))
+            ERRORS.inc(component="llm", type=type(e).__name__)
+            logger.error(f"LLM streaming error: {e!r}")
+            if self.fallback is not None and not streamed:
+                raise LLMUnavailableError(repr(e)) from e
+            raise LLMGenerationError(str(e)) from e
+    
+    def fallback_answer(
+        self, 
+        question: str, 
+        sources: List[SourceDocument], 
+        extracted: Optional[Dict] = None
+    ) -> str:
+        """Build answer locally from retrieved sources."""
+        self.fallback_answers += 1
+        LLM_FALLBACKS.inc()
+        generator = self.fallback or FallbackAnswerGenerator()
+        return generator.generate(question, sources, extracted)
+    
+    def get_stats(self) -> Dict:
+        """Get admission and fallback statistics."""
+        return {
+            "backend": self.backend.name,
+            **self.limiter.get_stats(),
+            "circuit": self.circuit.get_stats(),
+            "fallback_enabled": self.fallback is not None,
+            "fallback_answers": self.fallback_answers
+        }
     
     def check_health(self) -> str:
-        """Check if Gemini API is accessible."""
+        """Check if the LLM backend is accessible."""
+        try:
+            self.backend.generate("Привет")
+            return "connected"
+        except Exception as e:
+            logger.error(f"LLM health check failed: {e}")
+            return f"error: {str(e)}"
+    
+    async def acheck_health(self) -> Optional[str]:
+        """
+        Check if the LLM backend is accessible without blocking the event loop.
+        
+        The probe goes through admission control: it only uses a rate limiter
+        token nobody is waiting for and is not sent while the circuit is
+        open. After the recovery timeout it is the half-open trial call, so
+        its outcome closes or reopens the circuit. Returns None if it was
+        skipped for lack of quota.
+        """
+        # Quota first, so a skipped probe never takes the half-open trial
+        if not self.limiter.try_acquire(PRIORITY_BACKGROUND):
+            return None
+        if not self.circuit.allow():
+            return f"error: circuit {self.circuit.state}"
+        
         try:
-            response = self.model.generate_content("Привет")
+            await self.backend.agenerate("Привет")
+            self.circuit.record_success()
             return "connected"
         except Exception as e:
-            logger.error(f"Gemini health check failed: {e}")
+            self.circuit.record_failure(str(e) or repr(e))
+            logger.error(f"LLM health check failed: {e}")
             return f"error: {str(e)}"
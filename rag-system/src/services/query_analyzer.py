@@ -0,0 +1,106 @@
+"""Rule-based extraction of search filters from question text."""
+
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+from src.services.lexical_index import stem
+from src.utils.logger import logger
+
+
+# "75 баллов", "ЕНТ 75", "75 на ЕНТ", "балл ЕНТ 75"; "ент" only as a word
+# start, so "процентов 50 студентов" is not a score
+ENT_SCORE_RES = [
+    re.compile(r"(\d{2,3})\s*(?:балл\w*|б\.)", re.IGNORECASE),
+    re.compile(r"(?:\bент\w*|\bбалл\w*)\D{0,15}?(\d{2,3})\b", re.IGNORECASE),
+    re.compile(r"\b(\d{2,3})\s*(?:на\s+)?ент(?:[аеуы]|ом)?\b", re.IGNORECASE),
+]
+ENT_MAX_SCORE = 140
+
+WORD_RE = re.compile(r"[0-9a-zа-яёәғқңөұүһі]+", re.IGNORECASE)
+
+# Word stems pointing to a dataset category
+CATEGORY_KEYWORDS = {
+    "Медицина": ["медицин", "медик", "врач", "стоматолог", "фармац", "медсестр", "хирург"],
+    "IT и технологии": ["it", "айти", "программ", "информатик", "компьютер", "разработчик", "кибербезопасн"],
+    "Инженерия и техника": ["инженер", "техническ", "строител", "энергетик", "нефт", "горн"],
+    "Бизнес и экономика": ["экономи", "бизнес", "финанс", "менеджмент", "бухгалт", "маркетинг"],
+    "Педагогика": ["педагог", "учител", "преподав"],
+    "Искусство": ["искусств", "художник", "музык", "дизайн", "актер", "актёр", "хореограф"],
+}
+
+# Multi-profile universities teach every direction, so they always match a category
+MULTI_PROFILE_CATEGORY = "Многопрофильный"
+
+class QueryAnalyzer:
+    """
+    Extract ENT score, city and category from a question.
+    
+    Profile subjects are not extracted: ``profile_subjects`` is free text
+    (often just "Разные") that the where clause cannot match.
+    """
+    
+    def __init__(self, cities: List[str], categories: List[str]):
+        self.city_stems = {city: stem(city.lower()) for city in cities}
+        self.category_keywords = {
+            category: keywords
+            for category, keywords in CATEGORY_KEYWORDS.items()
+            if category in categories
+        }
+        self.multi_profile = MULTI_PROFILE_CATEGORY if MULTI_PROFILE_CATEGORY in categories else None
+        self.analyze = lru_cache(maxsize=4096)(self._analyze)
+        
+        logger.info(f"Query analyzer ready ({len(cities)} cities, {len(self.category_keywords)} categories)")
+    
+    @staticmethod
+    def _is_city_form(word: str, city_stem: str) -> bool:
+        """Whether word is an inflected form of the city (Астане, Семее)."""
+        if word.startswith(city_stem):
+            return True
+        # Short stems lose their last letter when inflected: Семей -> Семее
+        return (
+            len(city_stem) > 4
+            and abs(len(word) - len(city_stem)) <= 1
+            and word.startswith(city_stem[:-1])
+        )
+    
+    def _extract_score(self, text: str):
+        """Extract ENT score, if mentioned."""
+        for pattern in ENT_SCORE_RES:
+            for match in pattern.finditer(text):
+                score = int(match.group(1))
+                if 0 < score <= ENT_MAX_SCORE:
+                    return score
+        return None
+    
+    def _analyze(self, question: str) -> Dict:
+        """Extract filters from question text (cached by question)."""
+        text = question.lower().replace("ё", "е")
+        words = WORD_RE.findall(text)
+        extracted = {}
+        
+        score = self._extract_score(text)
+        if score is not None:
+            extracted["min_score"] = score
+        
+        cities = [
+            city for city, city_stem in self.city_stems.items()
+            if any(self._is_city_form(word, city_stem) for word in words)
+        ]
+        if len(cities) == 1:
+            extracted["city"] = cities[0]
+        
+        categories = [
+            category for category, keywords in self.category_keywords.items()
+            if any(word.startswith(keyword) for word in words for keyword in keywords)
+        ]
+        if len(categories) == 1:
+            extracted["category"] = [categories[0], self.multi_profile] if self.multi_profile else categories[0]
+        
+        return extracted
+    
+    def merge(self, question: str, filters: Dict = None) -> Dict:
+        """Extracted filters overridden by explicitly given ones."""
+        merged = dict(self.analyze(question))
+        merged.update({key: value for key, value in (filters or {}).items() if value})
+        return merged
@@ -0,0 +1,169 @@
+"""Query planner choosing how to combine filters with vector search."""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.services.search_backends import empty_results, NumpySearchBackend
+from src.utils.logger import logger
+
+
+FILTER_ONLY = "filter_only"
+PREFILTER = "prefilter"
+POSTFILTER = "postfilter"
+SEARCH = "search"
+
+ENT_MAX_SCORE = 140
+
+
+@dataclass
+class QueryPlan:
+    """Chosen retrieval strategy for one request."""
+    strategy: str
+    filters: Optional[Dict]
+    matches: int
+    total: int
+    top_k: int
+    matched_rows: List[int] = field(default_factory=list, repr=False)
+    
+    def to_dict(self) -> Dict:
+        return {
+            "strategy": self.strategy,
+            "filters": self.filters,
+            "matches": self.matches,
+            "total": self.total,
+            "top_k": self.top_k
+        }
+
+
+class QueryPlanner:
+    """
+    Count filter matches with per-facet bitmaps and pick a strategy.
+    
+    Each facet value (city, category) and each ENT threshold has a bitmap over
+    the university table, so counting matches is a few ANDs and a popcount.
+    
+    - ``filter_only``: matches <= top_k, every match is returned, ranked in
+      memory against its stored embedding without a search backend query
+    - ``prefilter``: selective filters, search inside the filtered subset
+    - ``postfilter``: broad filters, search everything and filter the hits
+    - ``search``: no filters, plain vector search
+    
+    ``ranker`` holds the embeddings in the planner's row order; without it
+    filter-only plans are not chosen.
+    """
+    
+    def __init__(
+        self, 
+        ids: List[str], 
+        documents: List[str], 
+        metadatas: List[Dict], 
+        prefilter_ratio: float = 0.3, 
+        oversample: int = 4, 
+        ranker: Optional[NumpySearchBackend] = None
+    ):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.prefilter_ratio = prefilter_ratio
+        self.oversample = oversample
+        self.ranker = ranker
+        self.all_rows = (1 << len(self.ids)) - 1
+        self.row_by_id = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        
+        self.city_bitmaps: Dict[str, int] = {}
+        self.category_bitmaps: Dict[str, int] = {}
+        for row, metadata in enumerate(self.metadatas):
+            bit = 1 << row
+            city = metadata.get("city", "")
+            category = metadata.get("category", "")
+            self.city_bitmaps[city] = self.city_bitmaps.get(city, 0) | bit
+            self.category_bitmaps[category] = self.category_bitmaps.get(category, 0) | bit
+        
+        # Threshold bitmaps: rows with ent_min_score <= s, rows with ent_max_score >= s
+        self.min_score_bitmaps = [0] * (ENT_MAX_SCORE + 1)
+        self.max_score_bitmaps = [0] * (ENT_MAX_SCORE + 1)
+        for score in range(ENT_MAX_SCORE + 1):
+            for row, metadata in enumerate(self.metadatas):
+                if metadata.get("ent_min_score", 0) <= score:
+                    self.min_score_bitmaps[score] |= 1 << row
+                if metadata.get("ent_max_score", 0) >= score:
+                    self.max_score_bitmaps[score] |= 1 << row
+        
+        logger.info(f"Query planner ready ({len(self.ids)} universities)")
+    
+    @classmethod
+    def from_backend(cls, backend: NumpySearchBackend, **kwargs) -> "QueryPlanner":
+        """Build planner over the documents of an exact backend, which also ranks filter-only matches."""
+        return cls(backend.ids, backend.documents, backend.metadatas, ranker=backend, **kwargs)
+    
+    @classmethod
+    def from_collection(cls, collection, **kwargs) -> "QueryPlanner":
+        """Build planner from all documents and embeddings in a ChromaDB collection."""
+        return cls.from_backend(NumpySearchBackend.from_collection(collection), **kwargs)
+    
+    @staticmethod
+    def _clamp(score) -> int:
+        return max(0, min(int(score), ENT_MAX_SCORE))
+    
+    def _facet_bitmap(self, bitmaps: Dict[str, int], value) -> int:
+        """Bitmap for a facet value or list of values."""
+        values = value if isinstance(value, list) else [value]
+        bitmap = 0
+        for v in values:
+            bitmap |= bitmaps.get(v, 0)
+        return bitmap
+    
+    def match_bitmap(self, filters: Optional[Dict]) -> int:
+        """Bitmap of rows matching filters."""
+        bitmap = self.all_rows
+        if not filters:
+            return bitmap
+        
+        if filters.get("city"):
+            bitmap &= self._facet_bitmap(self.city_bitmaps, filters["city"])
+        if filters.get("category"):
+            bitmap &= self._facet_bitmap(self.category_bitmaps, filters["category"])
+        if filters.get("min_score"):
+            bitmap &= self.min_score_bitmaps[self._clamp(filters["min_score"])]
+        if filters.get("max_score"):
+            bitmap &= self.max_score_bitmaps[self._clamp(filters["max_score"])]
+        return bitmap
+    
+    def count(self, filters: Optional[Dict]) -> int:
+        """Number of rows matching filters."""
+        return self.match_bitmap(filters).bit_count()
+    
+    def plan(self, filters: Optional[Dict], top_k: int) -> QueryPlan:
+        """Choose retrieval strategy for filters and top_k."""
+        total = len(self.ids)
+        bitmap = self.match_bitmap(filters)
+        matches = bitmap.bit_count()
+        
+        if filters and matches <= top_k and self.ranker is not None:
+            rows = [row for row in range(total) if bitmap >> row & 1]
+            return QueryPlan(FILTER_ONLY, filters, matches, total, top_k, rows)
+        
+        if filters and matches <= total * self.prefilter_ratio:
+            return QueryPlan(PREFILTER, filters, matches, total, top_k)
+        
+        return QueryPlan(POSTFILTER if filters else SEARCH, filters, matches, total, top_k)
+    
+    def filter_only_results(self, plan: QueryPlan, query_embedding: List[float]) -> Dict:
+        """All matched rows in search result format, ranked in memory by distance to the query."""
+        if not plan.matched_rows:
+            return empty_results()
+        return self.ranker.rank(query_embedding, plan.matched_rows)
+    
+    def post_filter(self, results: Dict, filters: Optional[Dict], top_k: int) -> Dict:
+        """Keep only hits matching filters, at most top_k."""
+        bitmap = self.match_bitmap(filters)
+        
+        keep = [
+            i for i, doc_id in enumerate(results["ids"][0])
+            if doc_id in self.row_by_id and bitmap >> self.row_by_id[doc_id] & 1
+        ][:top_k]
+        
+        return {
+            key: [[results[key][0][i] for i in keep]]
+            for key in ("ids", "documents", "metadatas", "distances")
+        }
@@ -1,15 +1,31 @@
 """RAG Pipeline with caching and logging."""
 
 import time
+import json
+import asyncio
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
 
 from src.config.config import config
 from src.models.schemas import QueryRequest, RAGResponse, SourceDocument
 from src.services.vector_store import VectorStore
-from src.services.llm_service import LLMService
+from src.services.llm_service import LLMService, LLMUnavailableError, LLMGenerationError, ERROR_ANSWER
+from src.services.cache import create_response_cache, with_request_fields
+from src.services.semantic_cache import SemanticCache
+from src.services.context_packer import ContextPacker, compact_variants, field_variants
+from src.services.embedding_batcher import EmbeddingBatcher
+from src.services.query_analyzer import QueryAnalyzer
+from src.services.rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_BATCH, RateLimitExceeded
+from src.services.query_planner import (
+    QueryPlan, QueryPlanner, FILTER_ONLY, PREFILTER, POSTFILTER, SEARCH
+)
+from src.utils.data_loader import DataLoader
 from src.utils.logger import logger
+from src.utils.metrics import STAGE_SECONDS, CONTEXT_TOKENS, CACHE_REQUESTS, ERRORS
+from src.utils.serialization import dumps
 
 
 class RAGPipeline:
@@ -21,83 +37,866 @@ class RAGPipeline:
         # Initialize components
         self.vector_store = VectorStore(
             persist_directory=config.vector_db_path,
-            embedding_model_name=config.embedding_model
+            embedding_model_name=config.embedding_model,
+            backend=config.vector_backend,
+            embedding_backend=config.embedding_backend,
+            onnx_model_dir=config.onnx_model_dir,
+            hybrid_search=config.enable_hybrid_search,
+            hybrid_candidates=config.hybrid_candidates,
+            rrf_k=config.rrf_k,
+            index_snapshot_path=config.index_snapshot_path
         )
         
         self.llm_service = LLMService(api_key=config.gemini_api_key)
         
+        # Dataset version the derived components below were built from
+        self.data_loader = DataLoader(config.data_path)
+        self.dataset_version = self.data_loader.store.get().version
+        self._reload_lock = threading.Lock()
+        
+        # Rule-based filter extraction from question text
+        self.query_analyzer = self._create_query_analyzer()
+        
+        # Bitmap-based planner deciding whether vector search is needed;
+        # filter-only matches are ranked in memory by its exact backend
+        self.query_planner = self._create_query_planner()
+        
+        # Token-budgeted LLM context
+        self.context_packer = ContextPacker(
+            max_tokens=config.max_context_tokens,
+            compact=config.context_format == "compact"
+        )
+        
         # Cache
-        self.cache: Dict[str, RAGResponse] = {}
+        self.cache = create_response_cache()
         self.cache_enabled = config.enable_cache
         
+        # Semantic cache for paraphrased questions
+        self.semantic_cache: Optional[SemanticCache] = None
+        if config.enable_semantic_cache:
+            self.semantic_cache = SemanticCache(
+                dimension=config.embedding_dimension,
+                max_size=config.semantic_cache_max_size,
+                threshold=config.semantic_cache_threshold,
+                ttl=config.cache_ttl
+            )
+        
+        # Bounded executor for CPU-bound embedding and vector search
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.executor_workers,
+            thread_name_prefix="rag-search"
+        )
+        
+        # Micro-batching of concurrent query embeddings
+        self.embedding_batcher: Optional[EmbeddingBatcher] = None
+        if config.enable_embedding_batching:
+            self.embedding_batcher = EmbeddingBatcher(
+                encode_batch=self.vector_store.embed_queries,
+                executor=self.executor,
+                window_ms=config.embedding_batch_window_ms,
+                max_batch_size=config.embedding_batch_max_size
+            )
+        
+        # Single-flight: in-progress computations by cache key, kept until
+        # their answer is in the response cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending_writes: Dict[str, asyncio.Future] = {}
+        self.coalesced_requests = 0
+        
         logger.info("RAG Pipeline initialized successfully")
     
-    def _get_cache_key(self, question: str, filters: Optional[Dict] = None) -> str:
-        """Generate cache key from question and filters."""
-        key_data = question.lower().strip()
-        if filters:
-            key_data += str(sorted(filters.items()))
+    def _create_query_analyzer(self) -> Optional[QueryAnalyzer]:
+        """Build query analyzer over the dataset's cities and categories."""
+        if not config.enable_query_analysis:
+            return None
+        dataset_filters = self.data_loader.load_filters()
+        return QueryAnalyzer(
+            cities=dataset_filters.get("cities", []),
+            categories=dataset_filters.get("categories", [])
+        )
+    
+    def _create_query_planner(self) -> Optional[QueryPlanner]:
+        """Build query planner over the documents currently in the vector store."""
+        if not config.enable_query_planner:
+            return None
+        return QueryPlanner.from_backend(
+            self.vector_store.exact_backend(),
+            prefilter_ratio=config.planner_prefilter_ratio,
+            oversample=config.planner_oversample
+        )
+    
+    def refresh_dataset(self) -> bool:
+        """
+        Rebuild dataset-derived components if the dataset file changed.
+        
+        A single server process re-indexes changed documents into ChromaDB,
+        which also rebuilds the search backend and BM25 index; a read-only
+        index snapshot keeps serving the old documents until init_db.py is
+        rerun. The query analyzer (with its memoized results) and planner
+        are rebuilt and the answer caches cleared. Returns whether the
+        dataset changed.
+        """
+        snapshot = self.data_loader.store.get()
+        if snapshot.version == self.dataset_version:
+            return False
+        
+        with self._reload_lock:
+            if snapshot.version == self.dataset_version:
+                return False
+            logger.info(f"Dataset changed (version {snapshot.version[:12]}), rebuilding derived components")
+            
+            if self.vector_store.collection is not None and config.workers == 1:
+                chunks = self.data_loader.prepare_chunks(list(snapshot.universities))
+                self.vector_store.index_documents(chunks)
+            else:
+                logger.warning(
+                    "Dataset changed but the index is shared or read-only; "
+                    "run 'python scripts/init_db.py' and restart the server to search the new data"
+                )
+            
+            self.query_analyzer = self._create_query_analyzer()
+            self.query_planner = self._create_query_planner()
+            self.clear_cache()
+            self.dataset_version = snapshot.version
+            return True
+    
+    async def arefresh_dataset(self) -> bool:
+        """Run refresh_dataset in the executor (re-indexing embeds documents)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.refresh_dataset)
+    
+    def _get_scope_key(self, request: QueryRequest) -> str:
+        """Generate key from all request parameters except the question."""
+        return json.dumps({
+            "filters": self._resolve_filters(request)[0],
+            "top_k": request.top_k or config.top_k_results,
+            "temperature": request.temperature or 0.7
+        }, sort_keys=True, ensure_ascii=False)
+    
+    def _get_cache_key(self, request: QueryRequest) -> str:
+        """Generate cache key from all request parameters."""
+        key_data = request.question.lower().strip() + self._get_scope_key(request)
         return hashlib.md5(key_data.encode()).hexdigest()
     
+    def _get_cached(self, cache_key: str, start_time: float) -> Optional[RAGResponse]:
+        """Return a copy of cached response for key, if any."""
+        if not self.cache_enabled:
+            return None
+        
+        cached_response = self.cache.get(cache_key)
+        CACHE_REQUESTS.inc(cache="response", result="miss" if cached_response is None else "hit")
+        if cached_response is None:
+            return None
+        
+        cached_response.cached = True
+        cached_response.processing_time = time.time() - start_time
+        return cached_response
+    
+    def _get_cached_json(self, cache_key: str, start_time: float) -> Optional[bytes]:
+        """Return serialized cached response for key, if any."""
+        if not self.cache_enabled:
+            return None
+        
+        body = self.cache.get_json(cache_key)
+        CACHE_REQUESTS.inc(cache="response", result="miss" if body is None else "hit")
+        if body is None:
+            return None
+        return with_request_fields(body, True, time.time() - start_time)
+    
+    async def _aget_cached(self, cache_key: str, start_time: float) -> Optional[RAGResponse]:
+        """Async _get_cached; blocking cache backends are read in the executor."""
+        if not self.cache.blocking:
+            return self._get_cached(cache_key, start_time)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get_cached, cache_key, start_time)
+    
+    async def _aget_cached_json(self, cache_key: str, start_time: float) -> Optional[bytes]:
+        """Async _get_cached_json; blocking cache backends are read in the executor."""
+        if not self.cache.blocking:
+            return self._get_cached_json(cache_key, start_time)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get_cached_json, cache_key, start_time)
+    
+    def _get_semantic_cached(
+        self, 
+        request: QueryRequest, 
+        query_embedding: List[float], 
+        start_time: float
+    ) -> Optional[RAGResponse]:
+        """Return a copy of answer to a similar question, if any."""
+        if not self.cache_enabled or self.semantic_cache is None:
+            return None
+        
+        cached_response = self.semantic_cache.get(query_embedding, self._get_scope_key(request))
+        CACHE_REQUESTS.inc(cache="semantic", result="miss" if cached_response is None else "hit")
+        if cached_response is None:
+            return None
+        
+        cached_response.cached = True
+        cached_response.processing_time = time.time() - start_time
+        logger.info(f"Semantic cache hit for query: '{request.question[:50]}...'")
+        return cached_response
+    
+    def _build_response(
+        self, 
+        request: QueryRequest, 
+        cache_key: str, 
+        answer: str, 
+        sources: List[SourceDocument], 
+        start_time: float, 
+        query_embedding: Optional[List[float]] = None, 
+        plan: Optional[QueryPlan] = None, 
+        fallback: bool = False, 
+        context_tokens: Optional[int] = None, 
+        failed: bool = False
+    ) -> RAGResponse:
+        """Create response and store it in cache (fallback and failed answers are not cached)."""
+        response = RAGResponse(
+            answer=answer,
+            sources=sources,
+            processing_time=time.time() - start_time,
+            cached=False,
+            fallback=fallback,
+            context_tokens=context_tokens,
+            timestamp=datetime.now(),
+            extracted_filters=self._resolve_filters(request)[1] or None,
+            debug={"plan": plan.to_dict()} if config.debug and plan else None
+        )
+        
+        # Cache response
+        if self.cache_enabled and not fallback and not failed:
+            self._store_cached(cache_key, response)
+            if self.semantic_cache is not None and query_embedding is not None:
+                self.semantic_cache.set(query_embedding, self._get_scope_key(request), response)
+        
+        logger.info(f"Query processed in {response.processing_time:.2f}s")
+        return response
+    
+    def _store_cached(self, cache_key: str, response: RAGResponse):
+        """
+        Store response in the response cache.
+        
+        On the event loop, blocking cache backends are written from the
+        executor without waiting, so a locked database does not stall
+        other requests; the write is tracked in ``_pending_writes`` until
+        it is done.
+        """
+        if self.cache.blocking:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                write = loop.run_in_executor(self.executor, self.cache.set, cache_key, response)
+                self._pending_writes[cache_key] = write
+                write.add_done_callback(lambda _: self._pop_pending_write(cache_key, write))
+                return
+        self.cache.set(cache_key, response)
+    
+    def _pop_pending_write(self, cache_key: str, write: asyncio.Future):
+        """Forget a finished cache write unless a newer one replaced it."""
+        if self._pending_writes.get(cache_key) is write:
+            del self._pending_writes[cache_key]
+    
+    def _release_inflight(self, cache_key: str):
+        """
+        Drop a finished computation from single-flight.
+        
+        If its answer is still being written to the cache, identical
+        requests keep joining it until the write is done.
+        """
+        write = self._pending_writes.get(cache_key)
+        if write is not None and not write.done():
+            write.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+            return
+        self._inflight.pop(cache_key, None)
+    
     def process(self, request: QueryRequest) -> RAGResponse:
         """Process RAG query with optional caching."""
         start_time = time.time()
         
         # Check cache
-        cache_key = self._get_cache_key(request.question, request.filters)
-        if self.cache_enabled and cache_key in self.cache:
-            cached_response = self.cache[cache_key]
-            cached_response.cached = True
-            cached_response.processing_time = time.time() - start_time
+        cache_key = self._get_cache_key(request)
+        cached_response = self._get_cached(cache_key, start_time)
+        if cached_response:
             logger.info(f"Cache hit for query: '{request.question[:50]}...'")
             return cached_response
         
         try:
             logger.info(f"Processing query: '{request.question[:50]}...'")
             
-            # Step 1: Parse filters
-            filters = self._parse_filters(request.filters)
-            top_k = request.top_k or config.top_k_results
-            
-            # Step 2: Vector search
-            search_results = self.vector_store.search(
-                query=request.question,
-                top_k=top_k,
-                filters=filters
+            # Steps 1-3: Plan, embed query, check semantic cache, search
+            cached_response, search_results, query_embedding, plan = self._retrieve(
+                request, start_time
             )
+            if cached_response:
+                return cached_response
             
             if not search_results['documents'][0]:
                 return self._create_empty_response(start_time)
             
-            # Step 3: Prepare context
-            context, sources = self._prepare_context(search_results)
+            # Step 4: Prepare context
+            context, sources, context_tokens = self._prepare_context(search_results)
+            
+            # Step 5: Generate answer via LLM
+            try:
+                answer, tokens_used = self.llm_service.generate_answer(
+                    question=request.question,
+                    context=context,
+                    temperature=request.temperature or 0.7
+                )
+                failed = False
+            except LLMGenerationError as e:
+                answer, failed = ERROR_ANSWER.format(e), True
+            
+            # Step 6: Create response
+            return self._build_response(
+                request, cache_key, answer, sources, start_time, query_embedding, plan,
+                context_tokens=context_tokens, failed=failed
+            )
+        
+        except Exception as e:
+            ERRORS.inc(component="pipeline", type=type(e).__name__)
+            logger.error(f"Error processing query: {e}")
+            return self._create_error_response(start_time, str(e))
+    
+    async def aprocess(self, request: QueryRequest, priority: int = PRIORITY_INTERACTIVE) -> RAGResponse:
+        """
+        Process RAG query without blocking the event loop.
+        
+        priority orders the LLM call in the rate limiter queue; cache warming
+        and batch jobs should pass a lower priority than interactive traffic.
+        """
+        start_time = time.time()
+        
+        # Check cache
+        cache_key = self._get_cache_key(request)
+        cached_response = await self._aget_cached(cache_key, start_time)
+        if cached_response:
+            logger.info(f"Cache hit for query: '{request.question[:50]}...'")
+            return cached_response
+        
+        return await self._aprocess_miss(request, cache_key, start_time, priority)
+    
+    async def aprocess_json(self, request: QueryRequest, priority: int = PRIORITY_INTERACTIVE) -> bytes:
+        """
+        Process RAG query and return the response as JSON bytes.
+        
+        Cache hits are sent from the stored serialized response, without
+        copying, validating or re-encoding the model.
+        """
+        start_time = time.time()
+        
+        cache_key = self._get_cache_key(request)
+        body = await self._aget_cached_json(cache_key, start_time)
+        if body is not None:
+            logger.info(f"Cache hit for query: '{request.question[:50]}...'")
+            return body
+        
+        return dumps(await self._aprocess_miss(request, cache_key, start_time, priority))
+    
+    async def _aprocess_miss(
+        self, 
+        request: QueryRequest, 
+        cache_key: str, 
+        start_time: float, 
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> RAGResponse:
+        """Answer a query missing from the response cache."""
+        # Join an identical in-flight computation instead of starting another
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            self.coalesced_requests += 1
+            CACHE_REQUESTS.inc(cache="inflight", result="hit")
+            logger.info(f"Coalesced query: '{request.question[:50]}...'")
+            response = (await asyncio.shield(task)).model_copy(deep=True)
+            response.processing_time = time.time() - start_time
+            return response
+        
+        # Run as a task so a cancelled caller does not cancel the waiters
+        task = asyncio.ensure_future(
+            self._aprocess_uncached(request, cache_key, start_time, priority)
+        )
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda _: self._release_inflight(cache_key))
+        return await asyncio.shield(task)
+    
+    async def _aprocess_uncached(
+        self, 
+        request: QueryRequest, 
+        cache_key: str, 
+        start_time: float, 
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> RAGResponse:
+        """Run retrieval and generation for a query missing from the cache."""
+        try:
+            logger.info(f"Processing query: '{request.question[:50]}...'")
+            
+            # Steps 1-3: Plan, embed query, check semantic cache, search
+            cached_response, search_results, query_embedding, plan = await self._aretrieve(
+                request, start_time
+            )
+            if cached_response:
+                return cached_response
             
-            # Step 4: Generate answer via LLM
-            answer, tokens_used = self.llm_service.generate_answer(
+            # Steps 4-6: Prepare context, generate answer, create response
+            return await self._agenerate_response(
+                request, cache_key, search_results, query_embedding, plan, start_time, priority
+            )
+        
+        except RateLimitExceeded:
+            # Overload is the caller's to report (HTTP 429), not an error answer
+            raise
+        except Exception as e:
+            ERRORS.inc(component="pipeline", type=type(e).__name__)
+            logger.error(f"Error processing query: {e}")
+            return self._create_error_response(start_time, str(e))
+    
+    async def _agenerate_response(
+        self, 
+        request: QueryRequest, 
+        cache_key: str, 
+        search_results: Dict, 
+        query_embedding: Optional[List[float]], 
+        plan: QueryPlan, 
+        start_time: float, 
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> RAGResponse:
+        """Build context from search results and generate the answer."""
+        if not search_results['documents'][0]:
+            return self._create_empty_response(start_time)
+        
+        # Step 4: Prepare context
+        context, sources, context_tokens = self._prepare_context(search_results)
+        
+        # Step 5: Generate answer via LLM, or locally if it is unavailable
+        try:
+            answer, tokens_used = await self.llm_service.agenerate_answer(
                 question=request.question,
                 context=context,
-                temperature=request.temperature or 0.7
+                temperature=request.temperature or 0.7,
+                priority=priority
             )
+            fallback = failed = False
+        except LLMUnavailableError as e:
+            logger.warning(f"LLM unavailable ({e}), using fallback answer")
+            answer, fallback, failed = self._fallback_answer(request, sources), True, False
+        except LLMGenerationError as e:
+            answer, fallback, failed = ERROR_ANSWER.format(e), False, True
+        
+        # Step 6: Create response
+        return self._build_response(
+            request, cache_key, answer, sources, start_time, query_embedding, plan, fallback,
+            context_tokens, failed
+        )
+    
+    async def aprocess_batch(
+        self, 
+        requests: List[QueryRequest], 
+        priority: int = PRIORITY_BATCH
+    ) -> List[Union[RAGResponse, Exception]]:
+        """
+        Process several queries with shared embedding and retrieval.
+        
+        Cached and duplicate questions are answered once; the rest are
+        embedded in one encode call and searched in one executor hop. LLM
+        calls run with at most ``config.batch_llm_concurrency`` in flight.
+        Returns a response or the exception for each request, in order.
+        """
+        start_time = time.time()
+        results: List[Union[RAGResponse, Exception, None]] = [None] * len(requests)
+        
+        # Answer from cache, group identical questions by cache key
+        pending: Dict[str, List[int]] = {}
+        for i, request in enumerate(requests):
+            try:
+                cache_key = self._get_cache_key(request)
+            except Exception as e:
+                results[i] = e
+                continue
+            cached_response = await self._aget_cached(cache_key, start_time)
+            if cached_response:
+                results[i] = cached_response
+            else:
+                pending.setdefault(cache_key, []).append(i)
+        
+        if pending:
+            logger.info(f"Processing batch: {len(requests)} queries, {len(pending)} to answer")
+            outcomes = await self._aprocess_batch_uncached(
+                [(key, requests[indices[0]]) for key, indices in pending.items()],
+                start_time, priority
+            )
+            for indices, outcome in zip(pending.values(), outcomes):
+                for i in indices:
+                    results[i] = outcome
+        
+        return results
+    
+    async def _aprocess_batch_uncached(
+        self, 
+        items: List[Tuple[str, QueryRequest]], 
+        start_time: float, 
+        priority: int
+    ) -> List[Union[RAGResponse, Exception]]:
+        """Retrieve and generate for unique cache misses of a batch."""
+        outcomes: List[Union[RAGResponse, Exception, None]] = [None] * len(items)
+        plans: List[Optional[QueryPlan]] = [None] * len(items)
+        embeddings: List[Optional[List[float]]] = [None] * len(items)
+        search_results: List[Optional[Dict]] = [None] * len(items)
+        
+        # Step 1: Plan
+        for j, (_, request) in enumerate(items):
+            try:
+                plans[j] = self._plan_query(request)
+            except Exception as e:
+                outcomes[j] = e
+        
+        # Step 2: Embed all remaining questions in one call
+        to_embed = [j for j in range(len(items)) if outcomes[j] is None]
+        if to_embed:
+            loop = asyncio.get_running_loop()
+            try:
+                with STAGE_SECONDS.time(stage="embed_batch"):
+                    vectors = await loop.run_in_executor(
+                        self.executor, self.vector_store.embed_queries, [items[j][1].question for j in to_embed]
+                    )
+            except Exception as e:
+                vectors = None
+                for j in to_embed:
+                    outcomes[j] = e
+            
+            # Step 3: Semantic cache, then one batched search for the rest
+            to_search = []
+            for j, vector in zip(to_embed, vectors or []):
+                embeddings[j] = vector
+                cached_response = self._get_semantic_cached(items[j][1], vector, start_time)
+                if cached_response:
+                    outcomes[j] = cached_response
+                elif plans[j].strategy == FILTER_ONLY:
+                    search_results[j] = self.query_planner.filter_only_results(plans[j], vector)
+                else:
+                    to_search.append(j)
             
-            # Step 5: Create response
-            response = RAGResponse(
-                answer=answer,
-                sources=sources,
-                processing_time=time.time() - start_time,
-                cached=False,
-                timestamp=datetime.now()
+            if to_search:
+                try:
+                    with STAGE_SECONDS.time(stage="search_batch"):
+                        batch_results = await loop.run_in_executor(
+                            self.executor, self._search_batch,
+                            [items[j][1] for j in to_search], [embeddings[j] for j in to_search],
+                            [plans[j] for j in to_search]
+                        )
+                except Exception as e:
+                    batch_results = [e] * len(to_search)
+                for j, result in zip(to_search, batch_results):
+                    if isinstance(result, Exception):
+                        ERRORS.inc(component="pipeline", type=type(result).__name__)
+                        logger.error(f"Error searching batch query: {result}")
+                        outcomes[j] = result
+                    else:
+                        search_results[j] = result
+        
+        # Steps 4-6: Generate answers with bounded concurrency
+        semaphore = asyncio.Semaphore(config.batch_llm_concurrency)
+        
+        async def generate(j: int) -> Union[RAGResponse, Exception]:
+            cache_key, request = items[j]
+            async with semaphore:
+                try:
+                    return await self._agenerate_response(
+                        request, cache_key, search_results[j], embeddings[j], plans[j], start_time, priority
+                    )
+                except Exception as e:
+                    ERRORS.inc(component="pipeline", type=type(e).__name__)
+                    logger.error(f"Error processing batch query: {e}")
+                    return e
+        
+        to_generate = [j for j in range(len(items)) if outcomes[j] is None]
+        generated = await asyncio.gather(*(generate(j) for j in to_generate))
+        for j, outcome in zip(to_generate, generated):
+            outcomes[j] = outcome
+        
+        return outcomes
+    
+    async def _aembed(self, question: str) -> List[float]:
+        """Embed query in the executor, batched with concurrent queries if enabled."""
+        if self.embedding_batcher is not None:
+            return await self.embedding_batcher.embed(question)
+        
+        # CPU-bound embedding must not run on the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.vector_store.embed_query, question
+        )
+    
+    def _plan_query(self, request: QueryRequest) -> QueryPlan:
+        """Resolve filters and choose retrieval strategy."""
+        filters, extracted = self._resolve_filters(request)
+        top_k = request.top_k or config.top_k_results
+        
+        if self.query_planner is None:
+            return QueryPlan(PREFILTER if filters else SEARCH, filters, -1, -1, top_k)
+        
+        plan = self.query_planner.plan(filters, top_k)
+        
+        # Extracted filters are a guess; never let them empty the result
+        if plan.matches == 0 and extracted:
+            logger.info(f"No matches for extracted filters {extracted}, planning without them")
+            plan = self.query_planner.plan(self._parse_filters(request.filters), top_k)
+        
+        logger.debug(f"Query plan: {plan.to_dict()}")
+        return plan
+    
+    def _search_args(self, plan: QueryPlan) -> Tuple[Optional[Dict], int]:
+        """Filters and result count of the first search for a plan."""
+        if plan.strategy == POSTFILTER:
+            # Broad filters: unfiltered search is cheaper, drop non-matching hits
+            return None, plan.top_k * self.query_planner.oversample
+        return plan.filters, plan.top_k
+    
+    def _search(self, request: QueryRequest, query_embedding: List[float], plan: QueryPlan) -> Dict:
+        """Run vector search following the plan."""
+        if plan.strategy == FILTER_ONLY:
+            # At most top_k matches: rank them in memory, no backend query
+            return self.query_planner.filter_only_results(plan, query_embedding)
+        
+        filters, top_k = self._search_args(plan)
+        search_results = self.vector_store.search(
+            query=request.question,
+            top_k=top_k,
+            filters=filters,
+            query_embedding=query_embedding
+        )
+        return self._refine_search(request, query_embedding, plan, search_results)
+    
+    def _search_batch(
+        self, 
+        requests: List[QueryRequest], 
+        query_embeddings: List[List[float]], 
+        plans: List[QueryPlan]
+    ) -> List[Union[Dict, Exception]]:
+        """
+        Run vector search for several queries, one backend call per distinct filter set.
+        
+        A failed call yields its exception for every query of that filter set.
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, plan in enumerate(plans):
+            filters, top_k = self._search_args(plan)
+            groups.setdefault(json.dumps([filters, top_k], sort_keys=True, ensure_ascii=False), []).append(i)
+        
+        results: List[Union[Dict, Exception, None]] = [None] * len(plans)
+        for indices in groups.values():
+            filters, top_k = self._search_args(plans[indices[0]])
+            try:
+                batch = self.vector_store.search_batch(
+                    [requests[i].question for i in indices],
+                    [query_embeddings[i] for i in indices],
+                    top_k=top_k,
+                    filters=filters
+                )
+            except Exception as e:
+                for i in indices:
+                    results[i] = e
+                continue
+            
+            for i, search_results in zip(indices, batch):
+                try:
+                    results[i] = self._refine_search(requests[i], query_embeddings[i], plans[i], search_results)
+                except Exception as e:
+                    results[i] = e
+        
+        return results
+    
+    def _refine_search(
+        self, 
+        request: QueryRequest, 
+        query_embedding: List[float], 
+        plan: QueryPlan, 
+        search_results: Dict
+    ) -> Dict:
+        """Apply post-filtering and empty-result retries to the first search."""
+        if plan.strategy == POSTFILTER:
+            filtered = self.query_planner.post_filter(search_results, plan.filters, plan.top_k)
+            if len(filtered['ids'][0]) >= min(plan.top_k, plan.matches):
+                return filtered
+            logger.debug("Post-filter left too few results, searching with filters")
+            search_results = self.vector_store.search(
+                query=request.question,
+                top_k=plan.top_k,
+                filters=plan.filters,
+                query_embedding=query_embedding
+            )
+        
+        # Without planner counts, retry without extracted filters on empty result
+        if self.query_planner is None and not search_results['documents'][0]:
+            explicit = self._parse_filters(request.filters)
+            if explicit != plan.filters:
+                logger.info("No results with extracted filters, retrying without them")
+                search_results = self.vector_store.search(
+                    query=request.question,
+                    top_k=plan.top_k,
+                    filters=explicit,
+                    query_embedding=query_embedding
+                )
+        
+        return search_results
+    
+    def _retrieve(
+        self, 
+        request: QueryRequest, 
+        start_time: float
+    ) -> Tuple[Optional[RAGResponse], Optional[Dict], Optional[List[float]], QueryPlan]:
+        """
+        Plan and run retrieval.
+        
+        Returns (semantic cache hit, search results, query embedding, plan).
+        """
+        with STAGE_SECONDS.time(stage="plan"):
+            plan = self._plan_query(request)
+        
+        with STAGE_SECONDS.time(stage="embed"):
+            query_embedding = self.vector_store.embed_query(request.question)
+        cached_response = self._get_semantic_cached(request, query_embedding, start_time)
+        if cached_response:
+            return cached_response, None, query_embedding, plan
+        
+        with STAGE_SECONDS.time(stage="search"):
+            search_results = self._search(request, query_embedding, plan)
+        return None, search_results, query_embedding, plan
+    
+    async def _aretrieve(
+        self, 
+        request: QueryRequest, 
+        start_time: float
+    ) -> Tuple[Optional[RAGResponse], Optional[Dict], Optional[List[float]], QueryPlan]:
+        """Plan and run retrieval without blocking the event loop (see _retrieve)."""
+        with STAGE_SECONDS.time(stage="plan"):
+            plan = self._plan_query(request)
+        
+        # Stage times include waiting for the executor and embedding batcher
+        with STAGE_SECONDS.time(stage="embed"):
+            query_embedding = await self._aembed(request.question)
+        cached_response = self._get_semantic_cached(request, query_embedding, start_time)
+        if cached_response:
+            return cached_response, None, query_embedding, plan
+        
+        with STAGE_SECONDS.time(stage="search"):
+            if plan.strategy == FILTER_ONLY:
+                # A few in-memory dot products, cheaper than an executor hop
+                search_results = self._search(request, query_embedding, plan)
+            else:
+                loop = asyncio.get_running_loop()
+                search_results = await loop.run_in_executor(
+                    self.executor, self._search, request, query_embedding, plan
+                )
+        return None, search_results, query_embedding, plan
+    
+    async def astream(self, request: QueryRequest) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Process RAG query as a stream of (event, data) pairs.
+        
+        Yields ``sources`` with the retrieved documents first, then ``token``
+        chunks of the answer, then ``done`` with final metadata. The full
+        answer is cached once the stream completes.
+        """
+        start_time = time.time()
+        
+        # Cached answers are replayed as a single chunk
+        cache_key = self._get_cache_key(request)
+        cached_response = await self._aget_cached(cache_key, start_time)
+        if cached_response:
+            logger.info(f"Cache hit for streamed query: '{request.question[:50]}...'")
+            yield "sources", cached_response.sources
+            yield "token", cached_response.answer
+            yield "done", {"cached": True, "processing_time": cached_response.processing_time}
+            return
+        
+        try:
+            logger.info(f"Streaming query: '{request.question[:50]}...'")
+            cached_response, search_results, query_embedding, plan = await self._aretrieve(
+                request, start_time
             )
             
-            # Cache response
-            if self.cache_enabled:
-                self.cache[cache_key] = response
+            if cached_response:
+                yield "sources", cached_response.sources
+                yield "token", cached_response.answer
+                yield "done", {"cached": True, "processing_time": cached_response.processing_time}
+                return
             
-            logger.info(f"Query processed in {response.processing_time:.2f}s")
-            return response
+            if not search_results['documents'][0]:
+                empty = self._create_empty_response(start_time)
+                yield "sources", []
+                yield "token", empty.answer
+                yield "done", {"cached": False, "processing_time": empty.processing_time}
+                return
+            
+            context, sources, context_tokens = self._prepare_context(search_results)
+            yield "sources", sources
             
+            chunks = []
+            fallback = failed = False
+            try:
+                async for chunk in self.llm_service.astream_answer(
+                    question=request.question,
+                    context=context,
+                    temperature=request.temperature or 0.7
+                ):
+                    chunks.append(chunk)
+                    yield "token", chunk
+            except LLMUnavailableError as e:
+                logger.warning(f"LLM unavailable ({e}), streaming fallback answer")
+                chunks, fallback = [self._fallback_answer(request, sources)], True
+                yield "token", chunks[0]
+            except LLMGenerationError as e:
+                # Partial answers end with the error text and are not cached
+                chunks.append(ERROR_ANSWER.format(e))
+                failed = True
+                yield "token", chunks[-1]
+            except RateLimitExceeded as e:
+                # Sources are sent already, so overload ends the stream
+                logger.warning(f"Streamed query not admitted: {e}")
+                yield "error", {"detail": str(e), "status": 429, "retry_after": round(e.retry_after, 1)}
+                return
+            
+            response = self._build_response(
+                request, cache_key, "".join(chunks), sources, start_time, 
+                query_embedding, plan, fallback, context_tokens, failed
+            )
+            yield "done", {
+                "cached": False,
+                "fallback": fallback,
+                "context_tokens": context_tokens,
+                "processing_time": response.processing_time,
+                "debug": response.debug
+            }
+        
         except Exception as e:
-            logger.error(f"Error processing query: {e}")
-            return self._create_error_response(start_time, str(e))
+            ERRORS.inc(component="pipeline", type=type(e).__name__)
+            logger.error(f"Error streaming query: {e}")
+            yield "error", {"detail": str(e)}
+    
+    def _fallback_answer(self, request: QueryRequest, sources: List[SourceDocument]) -> str:
+        """Build answer locally from the retrieved sources."""
+        return self.llm_service.fallback_answer(
+            request.question, sources, self._resolve_filters(request)[1]
+        )
+    
+    def _resolve_filters(self, request: QueryRequest) -> Tuple[Optional[Dict], Dict]:
+        """
+        Merge explicit filters with those extracted from the question.
+        
+        Returns search filters and the extracted part (for transparency).
+        Explicit filters always win over extracted ones.
+        """
+        explicit = self._parse_filters(request.filters)
+        if self.query_analyzer is None:
+            return explicit, {}
+        
+        extracted = self.query_analyzer.analyze(request.question)
+        if not extracted:
+            return explicit, {}
+        
+        return self._parse_filters(self.query_analyzer.merge(request.question, explicit)), dict(extracted)
     
     def _parse_filters(self, filters: Optional[Dict]) -> Optional[Dict]:
         """Parse and validate filters."""
@@ -116,16 +915,21 @@ class RAGPipeline:
         
         return parsed if parsed else None
     
-    def _prepare_context(self, search_results: Dict) -> tuple[str, List[SourceDocument]]:
-        """Prepare context from search results."""
+    def _prepare_context(self, search_results: Dict) -> Tuple[str, List[SourceDocument], int]:
+        """
+        Pack search results into LLM context within the token budget.
+        
+        Returns context text, sources of the packed documents and the
+        estimated context token count.
+        """
+        start = time.perf_counter()
         sources = []
-        context_parts = []
         
-        for i, (doc, metadata, distance) in enumerate(zip(
+        for doc, metadata, distance in zip(
             search_results['documents'][0],
             search_results['metadatas'][0],
             search_results['distances'][0]
-        )):
+        ):
             # Calculate relevance score (1 - distance for cosine)
             relevance_score = max(0, 1 - distance)
             
@@ -142,20 +946,23 @@ class RAGPipeline:
                     "phone": metadata.get('phone', ''),
                     "email": metadata.get('email', ''),
                     "address": metadata.get('address', '')
-                }
+                },
+                profile_subjects=metadata.get('profile_subjects', '')
             )
             sources.append(source)
-            
-            # Add to context
-            context_parts.append(f"[Университет {i+1}]:\n{doc}")
-        
-        context = "\n\n---\n\n".join(context_parts)
         
-        # Truncate if too long
-        if len(context) > config.max_context_length:
-            context = context[:config.max_context_length] + "\n\n[...контекст обрезан...]"
+        # Whole documents or one-line summaries; contacts and minor fields
+        # are dropped before documents
+        if self.context_packer.compact:
+            documents = [compact_variants(metadata) for metadata in search_results['metadatas'][0]]
+        else:
+            documents = [field_variants(doc) for doc in search_results['documents'][0]]
+        packed = self.context_packer.pack(documents)
+        sources = [sources[i] for i in packed.included]
         
-        return context, sources
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="context")
+        CONTEXT_TOKENS.observe(packed.tokens)
+        return packed.text, sources, packed.tokens
     
     def _create_empty_response(self, start_time: float) -> RAGResponse:
         """Create response when no results found."""
@@ -179,12 +986,37 @@ class RAGPipeline:
     def clear_cache(self):
         """Clear the response cache."""
         self.cache.clear()
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
         logger.info("Cache cleared")
     
+    async def aclear_cache(self):
+        """Clear caches without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.clear_cache)
+    
+    async def aget_stats(self) -> Dict:
+        """Get pipeline statistics without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get_stats)
+    
+    def shutdown(self):
+        """Release pipeline resources."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("RAG Pipeline executor stopped")
+    
     def get_stats(self) -> Dict:
         """Get pipeline statistics."""
         return {
             "vector_db_count": self.vector_store.get_document_count(),
             "cache_size": len(self.cache),
-            "cache_enabled": self.cache_enabled
+            "cache_enabled": self.cache_enabled,
+            "cache": self.cache.get_stats(),
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache is not None else None,
+            "embedding_batcher": (
+                self.embedding_batcher.get_stats() if self.embedding_batcher is not None else None
+            ),
+            "llm_admission": self.llm_service.get_stats(),
+            "inflight_requests": len(self._inflight),
+            "coalesced_requests": self.coalesced_requests
         }
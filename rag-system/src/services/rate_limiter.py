@@ -0,0 +1,157 @@
+"""Token-bucket admission control with a priority queue for LLM calls."""
+
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.logger import logger
+
+
+# Lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BATCH: "batch",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class RateLimitExceeded(Exception):
+    """Request could not be admitted before its deadline or the queue is full."""
+    
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds until the queue is likely drained
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket sized from the LLM quota, with a bounded priority queue.
+    
+    Tokens refill at ``rate_per_minute / 60`` per second up to ``burst``.
+    Requests that find no token wait in a queue ordered by priority, then
+    arrival; each waits at most ``timeout`` seconds.
+    """
+    
+    def __init__(self, rate_per_minute: float, burst: int = 3, max_queue_size: int = 100, timeout: float = 30.0):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+        
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        
+        # Metrics
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.admitted_by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        
+        logger.info(f"LLM rate limiter: {rate_per_minute:g}/min, burst {self.burst}, queue {max_queue_size}")
+    
+    def _refill(self):
+        """Add tokens accrued since last update."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def _pending(self) -> int:
+        """Number of waiters still interested in a token."""
+        return sum(1 for _, _, future in self._queue if not future.done())
+    
+    def _drain(self):
+        """Hand out available tokens to queued waiters in priority order."""
+        self._timer = None
+        self._refill()
+        
+        while self._queue and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue  # timed out or cancelled
+            self._tokens -= 1
+            future.set_result(None)
+        
+        # Drop abandoned waiters at the head
+        while self._queue and self._queue[0][2].done():
+            heapq.heappop(self._queue)
+        
+        if self._queue and self.rate > 0:
+            delay = (1 - self._tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._drain)
+    
+    def try_acquire(self, priority: int = PRIORITY_BACKGROUND) -> bool:
+        """Take a token only if one is available and nobody is waiting."""
+        self._refill()
+        if self._tokens >= 1 and not self._pending():
+            self._tokens -= 1
+            self._record(priority, 0.0)
+            return True
+        return False
+    
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None):
+        """Wait for a token; raise RateLimitExceeded on full queue or deadline."""
+        start = time.monotonic()
+        
+        # Fast path: token available and nobody ahead
+        if self.try_acquire(priority):
+            return
+        
+        if self._pending() >= self.max_queue_size:
+            self.rejected += 1
+            raise RateLimitExceeded("LLM request queue is full", self.retry_after())
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        if self._timer is None:
+            self._drain()
+        
+        try:
+            await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RateLimitExceeded("LLM rate limit: queue deadline exceeded", self.retry_after())
+        
+        self._record(priority, time.monotonic() - start)
+    
+    def retry_after(self) -> float:
+        """Seconds until every queued request and one more could get a token."""
+        self._refill()
+        if self.rate <= 0:
+            return self.timeout
+        return max(0.0, (self._pending() + 1 - self._tokens) / self.rate)
+    
+    def _record(self, priority: int, wait: float):
+        """Update admission metrics."""
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self.admitted_by_priority[name] = self.admitted_by_priority.get(name, 0) + 1
+    
+    def get_stats(self) -> Dict:
+        """Get limiter statistics."""
+        self._refill()
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "tokens_available": round(self._tokens, 2),
+            "queue_depth": self._pending(),
+            "max_queue_size": self.max_queue_size,
+            "admitted": self.admitted,
+            "admitted_by_priority": self.admitted_by_priority,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_wait": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+            "max_wait": round(self.max_wait, 3)
+        }
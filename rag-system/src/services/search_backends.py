@@ -0,0 +1,260 @@
+"""Search backends used by VectorStore."""
+
+import numpy as np
+from typing import Dict, List, Optional
+
+from src.utils.logger import logger
+
+
+def empty_results() -> Dict:
+    """Create empty search result in ChromaDB format."""
+    return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+class FilterColumns:
+    """Columnar metadata arrays for evaluating filters as boolean masks."""
+    
+    def __init__(self, metadatas: List[Dict]):
+        self.size = len(metadatas)
+        self.cities = np.array([m.get("city", "") for m in metadatas], dtype=object)
+        self.categories = np.array([m.get("category", "") for m in metadatas], dtype=object)
+        self.ent_min = np.array([m.get("ent_min_score", 0) for m in metadatas], dtype=np.int32)
+        self.ent_max = np.array([m.get("ent_max_score", 0) for m in metadatas], dtype=np.int32)
+    
+    @staticmethod
+    def _match(column: np.ndarray, value) -> np.ndarray:
+        """Equality mask, or membership mask for list values."""
+        if isinstance(value, list):
+            return np.isin(column, value)
+        return column == value
+    
+    def mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Build boolean mask from filters, None if nothing is filtered."""
+        if not filters:
+            return None
+        
+        mask = np.ones(self.size, dtype=bool)
+        if filters.get("city"):
+            mask &= self._match(self.cities, filters["city"])
+        if filters.get("category"):
+            mask &= self._match(self.categories, filters["category"])
+        if filters.get("min_score"):
+            mask &= self.ent_min <= filters["min_score"]
+        if filters.get("max_score"):
+            mask &= self.ent_max >= filters["max_score"]
+        return mask
+
+
+class SearchBackend:
+    """Base class for vector search backends."""
+    
+    name = "base"
+    
+    def search(self, query_embedding: List[float], top_k: int, filters: Optional[Dict] = None) -> Dict:
+        """Return top_k matches in ChromaDB result format."""
+        raise NotImplementedError
+    
+    def search_batch(
+        self, 
+        query_embeddings: List[List[float]], 
+        top_k: int, 
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Search several queries sharing the same filters, one result per query."""
+        return [self.search(embedding, top_k, filters) for embedding in query_embeddings]
+
+
+class ChromaSearchBackend(SearchBackend):
+    """Search through ChromaDB collection query."""
+    
+    name = "chroma"
+    
+    def __init__(self, collection):
+        self.collection = collection
+    
+    def search(self, query_embedding: List[float], top_k: int, filters: Optional[Dict] = None) -> Dict:
+        """Search collection with a ChromaDB where clause."""
+        where = self._build_where_clause(filters) if filters else None
+        
+        return self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=top_k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+    
+    def search_batch(
+        self, 
+        query_embeddings: List[List[float]], 
+        top_k: int, 
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Search several queries in one collection query."""
+        where = self._build_where_clause(filters) if filters else None
+        
+        results = self.collection.query(
+            query_embeddings=list(query_embeddings),
+            n_results=top_k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        keys = ("ids", "documents", "metadatas", "distances")
+        return [{key: [results[key][i]] for key in keys} for i in range(len(query_embeddings))]
+    
+    def _build_where_clause(self, filters: Dict) -> Optional[Dict]:
+        """Build ChromaDB where clause from filters."""
+        conditions = []
+        
+        for field in ("city", "category"):
+            value = filters.get(field)
+            if isinstance(value, list):
+                conditions.append({field: {"$in": value}})
+            elif value:
+                conditions.append({field: {"$eq": value}})
+        
+        if filters.get("min_score"):
+            conditions.append({"ent_min_score": {"$lte": filters["min_score"]}})
+        
+        if filters.get("max_score"):
+            conditions.append({"ent_max_score": {"$gte": filters["max_score"]}})
+        
+        if len(conditions) == 0:
+            return None
+        elif len(conditions) == 1:
+            return conditions[0]
+        else:
+            return {"$and": conditions}
+
+
+class NumpySearchBackend(SearchBackend):
+    """
+    Exact in-memory search over a float32 embedding matrix.
+    
+    Filter fields are kept as columnar arrays and applied as boolean masks,
+    top-k is selected with argpartition. Distances follow the collection's
+    space (squared L2 by default, as in ChromaDB), so result sets match the
+    Chroma backend up to the order of ties and HNSW approximation. Ties
+    are broken by document id.
+    """
+    
+    # Decimals compared when ordering; closer distances count as ties
+    TIE_DECIMALS = 5
+    
+    name = "numpy"
+    
+    def __init__(
+        self, 
+        ids: List[str], 
+        embeddings, 
+        documents: List[str], 
+        metadatas: List[Dict], 
+        space: str = "l2"
+    ):
+        self.space = space
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.embeddings.ndim != 2:
+            self.embeddings = self.embeddings.reshape(len(self.ids), -1)
+        if space == "cosine":
+            norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+            self.embeddings = self.embeddings / np.maximum(norms, 1e-12)
+        self.sq_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+        self.id_rank = np.argsort(np.argsort(np.array(self.ids, dtype=object), kind="stable"))
+        
+        # Columnar metadata for filter masks
+        self.columns = FilterColumns(self.metadatas)
+        
+        logger.info(f"NumPy search backend loaded {len(self.ids)} documents ({space})")
+    
+    @classmethod
+    def from_collection(cls, collection) -> "NumpySearchBackend":
+        """Load all documents and embeddings from a ChromaDB collection."""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        embeddings = data["embeddings"] if len(data["ids"]) else np.zeros((0, 0), dtype=np.float32)
+        return cls(data["ids"], embeddings, data["documents"], data["metadatas"], space=space)
+    
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "NumpySearchBackend":
+        """Search a memory-mapped IndexSnapshot without copying embeddings (l2 and ip spaces)."""
+        return cls(snapshot.ids, snapshot.embeddings, snapshot.documents, snapshot.metadatas, space=snapshot.space)
+    
+    def _distances(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Compute distances from query (or a matrix of queries) to every document, or to rows."""
+        embeddings = self.embeddings if rows is None else self.embeddings[rows]
+        if self.space == "cosine":
+            norm = np.linalg.norm(query, axis=-1, keepdims=True)
+            return 1.0 - (query / np.maximum(norm, 1e-12)) @ embeddings.T
+        if self.space == "ip":
+            return 1.0 - query @ embeddings.T
+        sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+        query_sq = np.einsum("...i,...i->...", query, query)[..., None]
+        return np.maximum(sq_norms - 2.0 * (query @ embeddings.T) + query_sq, 0.0)
+    
+    def _top_k(self, distances: np.ndarray, candidates: np.ndarray, top_k: int) -> Dict:
+        """Select top_k candidates by distance, then by id."""
+        candidate_distances = distances[candidates]
+        
+        # Single and batched products round differently (2.0 vs 1.9999998),
+        # so near-equal distances are ordered by id to keep results stable
+        keys = np.round(candidate_distances, self.TIE_DECIMALS)
+        k = min(top_k, candidates.size)
+        if k < candidates.size:
+            kth = np.partition(keys, k - 1)[k - 1]
+            top = np.flatnonzero(keys <= kth)
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.lexsort((self.id_rank[candidates[top]], keys[top]))][:k]
+        indices = candidates[top]
+        
+        return {
+            "ids": [[self.ids[i] for i in indices]],
+            "documents": [[self.documents[i] for i in indices]],
+            "metadatas": [[self.metadatas[i] for i in indices]],
+            "distances": [[float(d) for d in candidate_distances[top]]]
+        }
+    
+    def _candidates(self, filters: Optional[Dict]) -> np.ndarray:
+        """Indices of documents passing the filters."""
+        mask = self.columns.mask(filters)
+        return np.flatnonzero(mask) if mask is not None else np.arange(len(self.ids))
+    
+    def rank(self, query_embedding: List[float], rows: List[int]) -> Dict:
+        """All given rows (e.g. every filter match) ordered by distance, then by id."""
+        if not rows:
+            return empty_results()
+        
+        candidates = np.asarray(rows, dtype=np.intp)
+        distances = np.zeros(len(self.ids), dtype=np.float32)
+        distances[candidates] = self._distances(np.asarray(query_embedding, dtype=np.float32), candidates)
+        return self._top_k(distances, candidates, candidates.size)
+    
+    def search(self, query_embedding: List[float], top_k: int, filters: Optional[Dict] = None) -> Dict:
+        """Exact top-k search with boolean filter masks."""
+        if not self.ids:
+            return empty_results()
+        
+        candidates = self._candidates(filters)
+        if candidates.size == 0:
+            return empty_results()
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        return self._top_k(self._distances(query), candidates, top_k)
+    
+    def search_batch(
+        self, 
+        query_embeddings: List[List[float]], 
+        top_k: int, 
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Exact top-k search for several queries with one matrix product."""
+        candidates = self._candidates(filters) if self.ids else np.arange(0)
+        if candidates.size == 0:
+            return [empty_results() for _ in query_embeddings]
+        
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        distances = self._distances(queries)
+        return [self._top_k(row, candidates, top_k) for row in distances]
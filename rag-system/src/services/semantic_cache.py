@@ -0,0 +1,154 @@
+"""Semantic answer cache keyed on question-embedding similarity."""
+
+import time
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from src.models.schemas import RAGResponse
+from src.utils.logger import logger
+
+
+class SemanticCache:
+    """
+    Cache of answered questions searched by cosine similarity.
+    
+    Embeddings live in one preallocated normalized float32 matrix, so a lookup
+    is a single matrix-vector product plus a boolean mask over the entries that
+    share the request scope (filters, top_k, temperature). When full, the
+    oldest entry is overwritten. Scope ids are dropped with their last entry,
+    so distinct filter combinations do not accumulate.
+    """
+    
+    def __init__(self, dimension: int, max_size: int = 10000, threshold: float = 0.92, ttl: int = 3600):
+        self.dimension = dimension
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        
+        self._embeddings = np.zeros((max_size, dimension), dtype=np.float32)
+        self._scopes = np.full(max_size, -1, dtype=np.int64)
+        self._expires = np.zeros(max_size, dtype=np.float64)
+        self._responses: List[Optional[RAGResponse]] = [None] * max_size
+        self._scope_ids: Dict[str, int] = {}
+        self._scope_counts: Dict[int, int] = {}
+        self._scope_names: Dict[int, str] = {}
+        self._next_scope_id = 0
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        
+        logger.info(f"Semantic cache initialized (max_size={max_size}, threshold={threshold})")
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Convert embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def get(self, embedding: Sequence[float], scope: str) -> Optional[RAGResponse]:
+        """Get a copy of the most similar cached answer within scope."""
+        query = self._normalize(embedding)
+        
+        with self._lock:
+            scope_id = self._scope_ids.get(scope)
+            if scope_id is None or self._size == 0:
+                self.misses += 1
+                return None
+            
+            n = self._size
+            mask = (self._scopes[:n] == scope_id) & (self._expires[:n] > time.time())
+            if not mask.any():
+                self.misses += 1
+                return None
+            
+            similarities = self._embeddings[:n] @ query
+            similarities[~mask] = -np.inf
+            best = int(np.argmax(similarities))
+            
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            response = self._responses[best]
+            score = float(similarities[best])
+        
+        logger.debug(f"Semantic cache hit (similarity={score:.3f})")
+        return response.model_copy(deep=True)
+    
+    def set(self, embedding: Sequence[float], scope: str, response: RAGResponse):
+        """Store answer for the question embedding within scope."""
+        if self.max_size <= 0:
+            return
+        
+        vector = self._normalize(embedding)
+        entry = response.model_copy(deep=True)
+        
+        with self._lock:
+            slot = self._next
+            self._release_scope(int(self._scopes[slot]))
+            scope_id = self._acquire_scope(scope)
+            
+            self._embeddings[slot] = vector
+            self._scopes[slot] = scope_id
+            self._expires[slot] = time.time() + self.ttl
+            self._responses[slot] = entry
+            
+            self._next = (slot + 1) % self.max_size
+            self._size = min(self._size + 1, self.max_size)
+    
+    def _acquire_scope(self, scope: str) -> int:
+        """Id of scope for a new entry, allocated on first use (lock held)."""
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None:
+            scope_id = self._next_scope_id
+            self._next_scope_id += 1
+            self._scope_ids[scope] = scope_id
+            self._scope_names[scope_id] = scope
+        self._scope_counts[scope_id] = self._scope_counts.get(scope_id, 0) + 1
+        return scope_id
+    
+    def _release_scope(self, scope_id: int):
+        """Drop one entry reference to scope, forgetting it with the last one (lock held)."""
+        if scope_id < 0:
+            return
+        count = self._scope_counts[scope_id] - 1
+        if count:
+            self._scope_counts[scope_id] = count
+        else:
+            del self._scope_counts[scope_id]
+            del self._scope_ids[self._scope_names.pop(scope_id)]
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._scopes.fill(-1)
+            self._responses = [None] * self.max_size
+            self._scope_ids.clear()
+            self._scope_counts.clear()
+            self._scope_names.clear()
+            self._next_scope_id = 0
+            self._next = 0
+            self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "scopes": len(self._scope_ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
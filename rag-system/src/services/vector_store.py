@@ -1,129 +1,344 @@
 """Vector store service using ChromaDB."""
 
+import json
+import hashlib
 import chromadb
+import numpy as np
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Optional
 from pathlib import Path
 
+from src.services.embedding_models import load_embedding_model
+from src.services.index_snapshot import IndexSnapshot, load_index_snapshot, write_index_snapshot
+from src.services.lexical_index import LexicalIndex
+from src.services.search_backends import (
+    empty_results, SearchBackend, ChromaSearchBackend, NumpySearchBackend
+)
 from src.utils.logger import logger
 
 
 class VectorStore:
     """ChromaDB vector store with sentence-transformers embeddings."""
     
-    def __init__(self, persist_directory: str, embedding_model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(
+        self, 
+        persist_directory: str, 
+        embedding_model_name: str = "paraphrase-multilingual-MiniLM-L12-v2", 
+        backend: str = "chroma", 
+        embedding_backend: str = "torch", 
+        onnx_model_dir: str = "./data/onnx", 
+        hybrid_search: bool = False, 
+        hybrid_candidates: int = 20, 
+        rrf_k: int = 60, 
+        index_snapshot_path: str = "./data/index_snapshot"
+    ):
         self.persist_directory = Path(persist_directory)
         if not self.persist_directory.is_absolute():
             self.persist_directory = Path(__file__).parent.parent.parent / persist_directory
         
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"Loading embedding model: {embedding_model_name}...")
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+        logger.info(f"Loading embedding model: {embedding_model_name} ({embedding_backend})...")
+        self.embedding_model = load_embedding_model(
+            embedding_model_name, embedding_backend, onnx_model_dir
+        )
+        self.embedding_model_id = f"{embedding_model_name}:{embedding_backend}"
         logger.info("Embedding model loaded successfully")
         
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_directory),
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # Read-only memory-mapped snapshot replaces ChromaDB in worker processes
+        self.snapshot: Optional[IndexSnapshot] = None
+        if backend == "mmap":
+            self.snapshot = self._load_snapshot(index_snapshot_path)
+            if self.snapshot is None:
+                logger.warning("Index snapshot unavailable, loading ChromaDB into the numpy backend")
+                backend = "numpy"
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name="universities",
-            metadata={"description": "Universities of Kazakhstan database"}
-        )
+        self.client = None
+        self.collection = None
+        if self.snapshot is None:
+            # Initialize ChromaDB
+            self.client = chromadb.PersistentClient(
+                path=str(self.persist_directory),
+                settings=Settings(anonymized_telemetry=False)
+            )
+            
+            # Get or create collection
+            self.collection = self.client.get_or_create_collection(
+                name="universities",
+                metadata={"description": "Universities of Kazakhstan database"}
+            )
         
-        logger.info(f"Vector store initialized at: {self.persist_directory}")
+        # Search backend (ChromaDB stays the persistent store)
+        self.backend_name = backend
+        self.backend = self._create_backend()
+        
+        # Lexical BM25 index fused with dense results
+        self.hybrid_search = hybrid_search
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.lexical_index: Optional[LexicalIndex] = None
+        if hybrid_search:
+            self.lexical_index = self._create_lexical_index()
+        
+        logger.info(f"Vector store initialized at: {self.persist_directory} (backend: {self.backend.name})")
     
-    def index_documents(self, documents: List[Dict], batch_size: int = 50):
-        """Index documents into vector store."""
+    def _load_snapshot(self, path: str) -> Optional[IndexSnapshot]:
+        """Load index snapshot built with the same embedding model, if any."""
         try:
-            # Check if already indexed
-            if self.collection.count() > 0:
-                logger.warning("Collection already has documents. Clearing...")
-                self.client.delete_collection("universities")
-                self.collection = self.client.get_or_create_collection(
-                    name="universities",
-                    metadata={"description": "Universities of Kazakhstan database"}
-                )
+            snapshot = load_index_snapshot(path)
+        except Exception as e:
+            logger.warning(f"Cannot load index snapshot from {path}: {e}")
+            return None
+        
+        if snapshot is None:
+            logger.warning(f"No index snapshot at {path}, run 'python scripts/init_db.py'")
+            return None
+        if snapshot.embedding_model != self.embedding_model_id:
+            logger.warning(
+                f"Index snapshot was built with {snapshot.embedding_model}, "
+                f"not {self.embedding_model_id}; run 'python scripts/init_db.py'"
+            )
+            return None
+        
+        logger.info(f"Mapped index snapshot {snapshot.version} ({len(snapshot.ids)} documents)")
+        return snapshot
+    
+    def _create_backend(self) -> SearchBackend:
+        """Create search backend over the current collection."""
+        if self.snapshot is not None:
+            return NumpySearchBackend.from_snapshot(self.snapshot)
+        if self.backend_name == "numpy":
+            return NumpySearchBackend.from_collection(self.collection)
+        if self.backend_name != "chroma":
+            logger.warning(f"Unknown vector backend '{self.backend_name}', using chroma")
+        return ChromaSearchBackend(self.collection)
+    
+    def _create_lexical_index(self) -> LexicalIndex:
+        """Build BM25 index over all documents."""
+        data = self.get_documents()
+        return LexicalIndex(data["ids"], data["documents"], data["metadatas"])
+    
+    def get_documents(self) -> Dict:
+        """Get ids, documents and metadatas of all indexed documents."""
+        if self.snapshot is not None:
+            return {
+                "ids": self.snapshot.ids,
+                "documents": self.snapshot.documents,
+                "metadatas": self.snapshot.metadatas
+            }
+        return self.collection.get(include=["documents", "metadatas"])
+    
+    def exact_backend(self) -> NumpySearchBackend:
+        """In-memory exact backend over all documents (the search backend itself when it is numpy)."""
+        if isinstance(self.backend, NumpySearchBackend):
+            return self.backend
+        return NumpySearchBackend.from_collection(self.collection)
+    
+    def write_snapshot(self, path: str) -> str:
+        """Write the collection as a memory-mappable index snapshot."""
+        data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        embeddings = data["embeddings"] if len(data["ids"]) else np.zeros((0, 0), dtype=np.float32)
+        return write_index_snapshot(
+            path, data["ids"], embeddings, data["documents"], data["metadatas"],
+            space=space, embedding_model=self.embedding_model_id
+        )
+    
+    def _content_hash(self, document: Dict) -> str:
+        """Hash chunk text, metadata and embedding model identity."""
+        payload = json.dumps({
+            "text": document["text"],
+            "metadata": document["metadata"],
+            "model": self.embedding_model_id
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def index_documents(self, documents: List[Dict], batch_size: int = 50) -> Dict[str, int]:
+        """
+        Incrementally index documents into vector store.
+        
+        Only new or changed chunks (by content hash) are embedded and upserted,
+        chunks missing from documents are deleted. Returns counts of added,
+        updated, removed and unchanged chunks.
+        """
+        if self.collection is None:
+            raise RuntimeError("Index snapshot is read-only, index with VECTOR_BACKEND=chroma")
+        
+        try:
+            # Hashes of what is already indexed
+            existing = self.collection.get(include=["metadatas"])
+            existing_hashes = {
+                doc_id: (metadata or {}).get("content_hash")
+                for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+            }
+            
+            to_upsert = []
+            stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+            for doc in documents:
+                content_hash = self._content_hash(doc)
+                if doc["id"] not in existing_hashes:
+                    stats["added"] += 1
+                elif existing_hashes[doc["id"]] != content_hash:
+                    stats["updated"] += 1
+                else:
+                    stats["unchanged"] += 1
+                    continue
+                to_upsert.append((doc, content_hash))
             
-            ids = [doc["id"] for doc in documents]
-            texts = [doc["text"] for doc in documents]
-            metadatas = [doc["metadata"] for doc in documents]
+            new_ids = {doc["id"] for doc in documents}
+            removed_ids = [doc_id for doc_id in existing_hashes if doc_id not in new_ids]
+            stats["removed"] = len(removed_ids)
             
-            logger.info(f"Creating embeddings for {len(documents)} documents...")
-            embeddings = self.embedding_model.encode(texts, show_progress_bar=True).tolist()
+            if to_upsert:
+                ids = [doc["id"] for doc, _ in to_upsert]
+                texts = [doc["text"] for doc, _ in to_upsert]
+                metadatas = [
+                    {**doc["metadata"], "content_hash": content_hash}
+                    for doc, content_hash in to_upsert
+                ]
+                
+                logger.info(f"Creating embeddings for {len(to_upsert)} new or changed documents...")
+                embeddings = self.embedding_model.encode(texts, show_progress_bar=True).tolist()
+                
+                # Upsert in batches; unchanged documents stay searchable meanwhile
+                for i in range(0, len(to_upsert), batch_size):
+                    batch_end = min(i + batch_size, len(to_upsert))
+                    self.collection.upsert(
+                        embeddings=embeddings[i:batch_end],
+                        documents=texts[i:batch_end],
+                        metadatas=metadatas[i:batch_end],
+                        ids=ids[i:batch_end]
+                    )
             
-            # Add to collection in batches
-            for i in range(0, len(documents), batch_size):
-                batch_end = min(i + batch_size, len(documents))
-                self.collection.add(
-                    embeddings=embeddings[i:batch_end],
-                    documents=texts[i:batch_end],
-                    metadatas=metadatas[i:batch_end],
-                    ids=ids[i:batch_end]
-                )
+            if removed_ids:
+                self.collection.delete(ids=removed_ids)
             
-            logger.info(f"Successfully indexed {len(documents)} documents")
+            # Rebuild search indexes over the new data
+            if to_upsert or removed_ids:
+                self.backend = self._create_backend()
+                if self.hybrid_search:
+                    self.lexical_index = self._create_lexical_index()
             
+            logger.info(
+                f"Indexed documents: {stats['added']} added, {stats['updated']} updated, "
+                f"{stats['removed']} removed, {stats['unchanged']} unchanged"
+            )
+            return stats
+        
         except Exception as e:
             logger.error(f"Error indexing documents: {e}")
             raise
     
-    def search(self, query: str, top_k: int = 5, filters: Optional[Dict] = None) -> Dict:
-        """Search for similar documents."""
+    def embed_query(self, query: str) -> List[float]:
+        """Create embedding for a search query."""
+        return self.embedding_model.encode(query).tolist()
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Create embeddings for several search queries in one call."""
+        return self.embedding_model.encode(queries).tolist()
+    
+    def search(
+        self, 
+        query: str, 
+        top_k: int = 5, 
+        filters: Optional[Dict] = None, 
+        query_embedding: Optional[List[float]] = None
+    ) -> Dict:
+        """Search for similar documents, reusing query_embedding if given."""
         try:
-            query_embedding = self.embedding_model.encode(query).tolist()
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             
-            # Build where clause for filters
-            where = None
-            if filters:
-                where = self._build_where_clause(filters)
-            
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                where=where,
-                include=["documents", "metadatas", "distances"]
-            )
+            if self.lexical_index is not None:
+                results = self._hybrid_search(query, query_embedding, top_k, filters)
+            else:
+                results = self.backend.search(query_embedding, top_k, filters)
             
             logger.debug(f"Search query: '{query[:50]}...' returned {len(results['ids'][0])} results")
             return results
-            
+        
         except Exception as e:
             logger.error(f"Search error: {e}")
-            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+            return empty_results()
+    
+    def search_batch(
+        self, 
+        queries: List[str], 
+        query_embeddings: List[List[float]], 
+        top_k: int = 5, 
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Search several queries sharing the same filters with one backend call."""
+        try:
+            if self.lexical_index is None:
+                return self.backend.search_batch(query_embeddings, top_k, filters)
+            
+            n_candidates = max(top_k, self.hybrid_candidates)
+            dense = self.backend.search_batch(query_embeddings, n_candidates, filters)
+            return [
+                self._hybrid_search(query, embedding, top_k, filters, dense=query_dense)
+                for query, embedding, query_dense in zip(queries, query_embeddings, dense)
+            ]
+        
+        except Exception as e:
+            logger.error(f"Batch search error: {e}")
+            return [empty_results() for _ in queries]
     
-    def _build_where_clause(self, filters: Dict) -> Optional[Dict]:
-        """Build ChromaDB where clause from filters."""
-        conditions = []
+    def _hybrid_search(
+        self, 
+        query: str, 
+        query_embedding: List[float], 
+        top_k: int, 
+        filters: Optional[Dict] = None, 
+        dense: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Fuse dense and BM25 rankings with reciprocal rank fusion.
         
-        if filters.get("city"):
-            conditions.append({"city": {"$eq": filters["city"]}})
+        Distances in the result are ``1 - fused score / best possible score``,
+        so relevance scores stay in [0, 1]. ``dense`` may hold precomputed
+        dense candidates (from a batched search).
+        """
+        n_candidates = max(top_k, self.hybrid_candidates)
+        if dense is None:
+            dense = self.backend.search(query_embedding, n_candidates, filters)
+        lexical = self.lexical_index.search(query, n_candidates, filters)
         
-        if filters.get("category"):
-            conditions.append({"category": {"$eq": filters["category"]}})
+        fused: Dict[str, float] = {}
+        documents: Dict[str, tuple] = {}
         
-        if filters.get("min_score"):
-            conditions.append({"ent_min_score": {"$lte": filters["min_score"]}})
+        for rank, (doc_id, doc, metadata) in enumerate(zip(
+            dense["ids"][0], dense["documents"][0], dense["metadatas"][0]
+        )):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+            documents[doc_id] = (doc, metadata)
         
-        if filters.get("max_score"):
-            conditions.append({"ent_max_score": {"$gte": filters["max_score"]}})
+        for rank, (index, _) in enumerate(lexical):
+            doc_id = self.lexical_index.ids[index]
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+            documents.setdefault(
+                doc_id, (self.lexical_index.documents[index], self.lexical_index.metadatas[index])
+            )
         
-        if len(conditions) == 0:
-            return None
-        elif len(conditions) == 1:
-            return conditions[0]
-        else:
-            return {"$and": conditions}
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        best_score = 2 / (self.rrf_k + 1)
+        
+        return {
+            "ids": [[doc_id for doc_id, _ in ranked]],
+            "documents": [[documents[doc_id][0] for doc_id, _ in ranked]],
+            "metadatas": [[documents[doc_id][1] for doc_id, _ in ranked]],
+            "distances": [[1 - score / best_score for _, score in ranked]]
+        }
     
     def get_document_count(self) -> int:
         """Get number of documents in collection."""
+        if self.snapshot is not None:
+            return len(self.snapshot.ids)
         return self.collection.count()
     
     def delete_collection(self):
         """Delete the collection."""
+        if self.client is None:
+            raise RuntimeError("Index snapshot is read-only")
         self.client.delete_collection("universities")
         logger.info("Collection deleted")
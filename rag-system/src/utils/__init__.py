@@ -1,2 +1,3 @@
 from .logger import logger
+from .dataset import DatasetSnapshot, DatasetStore, get_dataset_store
 from .data_loader import DataLoader
@@ -1,42 +1,29 @@
 """Data loader for universities JSON."""
 
-import json
+import copy
 from pathlib import Path
 from typing import List, Dict
+from src.utils.dataset import get_dataset_store, resolve_data_path
 from src.utils.logger import logger
 
 
 class DataLoader:
-    """Load and process university data from JSON."""
+    """Load and process university data from JSON (via the shared dataset snapshot)."""
     
     def __init__(self, data_path: str):
-        self.data_path = Path(data_path)
-        if not self.data_path.is_absolute():
-            self.data_path = Path(__file__).parent.parent.parent / data_path
+        self.data_path = resolve_data_path(data_path)
+        self.store = get_dataset_store(self.data_path)
     
     def load_universities(self) -> List[Dict]:
         """Load universities from JSON file."""
-        try:
-            with open(self.data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            universities = data.get('universities', [])
-            logger.info(f"Loaded {len(universities)} universities from {self.data_path.name}")
-            return universities
-            
-        except FileNotFoundError:
-            logger.error(f"File not found: {self.data_path}")
-            raise
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error: {e}")
-            raise
+        universities = list(self.store.get().universities)
+        logger.info(f"Loaded {len(universities)} universities from {self.data_path.name}")
+        return universities
     
     def load_filters(self) -> Dict:
-        """Load available filters from JSON."""
+        """Load available filters from JSON (a copy; the snapshot is shared)."""
         try:
-            with open(self.data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data.get('filters', {})
+            return copy.deepcopy(self.store.get().filters)
         except Exception as e:
             logger.error(f"Error loading filters: {e}")
             return {}
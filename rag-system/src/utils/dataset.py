@@ -0,0 +1,141 @@
+"""Process-wide in-memory snapshot of the universities dataset."""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from src.config.config import config
+from src.models.schemas import FilterOptions
+from src.utils.logger import logger
+
+
+DEFAULT_ENT_SCORE_RANGE = {"min": 50, "max": 100}
+
+
+def resolve_data_path(data_path: Union[str, Path]) -> Path:
+    """Resolve dataset path relative to the rag-system directory."""
+    path = Path(data_path)
+    if not path.is_absolute():
+        path = Path(__file__).parent.parent.parent / data_path
+    return path.resolve()
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """Immutable parsed dataset; replaced as a whole on reload."""
+    universities: Tuple[Dict, ...]
+    filters: Dict
+    filters_json: bytes  # pre-serialized /filters response
+    version: str  # sha256 of the file contents
+    mtime_ns: int
+    size: int
+    loaded_at: float
+
+
+class DatasetStore:
+    """
+    Load the dataset JSON once and hot-reload it when the file changes.
+    
+    ``get()`` stats the file at most every ``check_interval`` seconds; the
+    file is re-read only if mtime or size changed, and re-parsed only if its
+    hash changed. A new snapshot replaces the old one in a single reference
+    assignment, so readers always see a consistent dataset. If the file
+    becomes unreadable the last good snapshot is kept.
+    """
+    
+    def __init__(self, data_path: Union[str, Path], check_interval: float = 5.0):
+        self.data_path = resolve_data_path(data_path)
+        self.check_interval = check_interval
+        
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._checked_at = 0.0
+        self._failed_stat: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+    
+    def get(self) -> DatasetSnapshot:
+        """Get current snapshot, reloading it if the file changed."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+        
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._checked_at >= self.check_interval:
+                self._refresh()
+            return self._snapshot
+    
+    def _refresh(self):
+        """Reload the snapshot if the file changed (caller holds the lock)."""
+        current = self._snapshot
+        file_id = None
+        try:
+            stat = os.stat(self.data_path)
+            file_id = (stat.st_mtime_ns, stat.st_size)
+            if current is not None and file_id in ((current.mtime_ns, current.size), self._failed_stat):
+                return
+            
+            with open(self.data_path, 'rb') as f:
+                raw = f.read()
+            version = hashlib.sha256(raw).hexdigest()
+            if current is not None and version == current.version:
+                self._snapshot = DatasetSnapshot(
+                    current.universities, current.filters, current.filters_json,
+                    version, stat.st_mtime_ns, stat.st_size, current.loaded_at
+                )
+                return
+            
+            self._snapshot = self._parse(raw, version, stat)
+            self.reloads += 1
+            logger.info(
+                f"Loaded dataset {self.data_path.name} "
+                f"({len(self._snapshot.universities)} universities, version {version[:12]})"
+            )
+        
+        except (OSError, ValueError) as e:
+            if current is None:
+                logger.error(f"Error loading dataset {self.data_path}: {e}")
+                raise
+            # Do not re-read the same broken file on every check
+            self._failed_stat = file_id
+            logger.error(f"Dataset reload failed, keeping version {current.version[:12]}: {e}")
+        finally:
+            self._checked_at = time.monotonic()
+    
+    def _parse(self, raw: bytes, version: str, stat: os.stat_result) -> DatasetSnapshot:
+        """Parse file contents and precompute derived views."""
+        data = json.loads(raw)
+        filters = data.get('filters', {})
+        
+        filter_options = FilterOptions(
+            cities=filters.get("cities", []),
+            categories=filters.get("categories", []),
+            ent_score_range=filters.get("ent_score_range", DEFAULT_ENT_SCORE_RANGE)
+        )
+        
+        return DatasetSnapshot(
+            universities=tuple(data.get('universities', [])),
+            filters=filters,
+            filters_json=filter_options.model_dump_json().encode('utf-8'),
+            version=version,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            loaded_at=time.time()
+        )
+
+
+@lru_cache(maxsize=None)
+def _get_store(path: Path) -> DatasetStore:
+    return DatasetStore(path, check_interval=config.dataset_check_interval)
+
+
+def get_dataset_store(data_path: Optional[Union[str, Path]] = None) -> DatasetStore:
+    """Get the process-wide store for a dataset file (config.data_path by default)."""
+    if data_path is None:
+        data_path = config.data_path
+    return _get_store(resolve_data_path(data_path))
@@ -0,0 +1,285 @@
+"""Minimal Prometheus metrics (text exposition format)."""
+
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Latency buckets in seconds, from cache hits to slow Gemini answers
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    """Render a label set as {a="x",b="y"}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Labelled metric base; samples are keyed by label value tuples."""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+    
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        """Render HELP/TYPE header and samples."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+    
+    kind = "counter"
+    
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    
+    kind = "gauge"
+    
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+    
+    def dec(self, value: float = 1, **labels):
+        self.inc(-value, **labels)
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    @contextmanager
+    def track(self, **labels):
+        """Increment while the block runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels):
+        self._observe_key(self._key(labels), value)
+    
+    def time(self, **labels) -> "_Timer":
+        """Observe the duration of the block."""
+        return _Timer(self, self._key(labels))
+    
+    def _observe_key(self, key: Tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    """Context manager timing a block into a histogram (cheaper than @contextmanager)."""
+    
+    __slots__ = ("histogram", "key", "start")
+    
+    def __init__(self, histogram: Histogram, key: Tuple):
+        self.histogram = histogram
+        self.key = key
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.histogram._observe_key(self.key, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the metrics of the RAG system
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "rag_stage_duration_seconds", "Duration of pipeline stages", ["stage"]
+)
+CONTEXT_TOKENS = metrics.histogram(
+    "rag_context_tokens", "Estimated tokens of packed LLM context",
+    buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+)
+REQUEST_SECONDS = metrics.histogram(
+    "rag_http_request_duration_seconds", "HTTP request duration", ["endpoint", "status"]
+)
+INFLIGHT_REQUESTS = metrics.gauge(
+    "rag_http_requests_in_flight", "HTTP requests being processed", ["endpoint"]
+)
+LLM_INFLIGHT = metrics.gauge(
+    "rag_llm_calls_in_flight", "Gemini calls in progress"
+)
+CACHE_REQUESTS = metrics.counter(
+    "rag_cache_requests_total", "Cache lookups", ["cache", "result"]
+)
+LLM_TOKENS = metrics.counter(
+    "rag_llm_tokens_total", "Gemini tokens from usage_metadata", ["type"]
+)
+LLM_FALLBACKS = metrics.counter(
+    "rag_llm_fallback_answers_total", "Answers built locally because the LLM was unavailable"
+)
+ERRORS = metrics.counter(
+    "rag_errors_total", "Errors by component and exception type", ["component", "type"]
+)
+CACHE_ENTRIES = metrics.gauge(
+    "rag_cache_entries", "Entries in response caches", ["cache"]
+)
+LLM_QUEUE_DEPTH = metrics.gauge(
+    "rag_llm_queue_depth", "Requests waiting for LLM rate limiter admission"
+)
+LLM_CIRCUIT_OPEN = metrics.gauge(
+    "rag_llm_circuit_open", "1 if the LLM circuit breaker is not closed"
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware tracking in-flight requests and latency per route."""
+    
+    def __init__(self, app, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+        self._paths: Optional[set] = None
+    
+    def _endpoint(self, scope) -> str:
+        """Route path label; unknown paths share one label to bound cardinality."""
+        if self._paths is None:
+            self._paths = {getattr(route, "path", None) for route in scope["app"].routes}
+        return scope["path"] if scope["path"] in self._paths else "unmatched"
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        
+        endpoint = self._endpoint(scope)
+        status: Optional[int] = None
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        INFLIGHT_REQUESTS.inc(endpoint=endpoint)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            INFLIGHT_REQUESTS.dec(endpoint=endpoint)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, status=status or 500)
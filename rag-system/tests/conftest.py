@@ -0,0 +1,7 @@
+"""Pytest configuration: make the ``src`` package importable."""
+
+import sys
+from pathlib import Path
+
+# Add rag-system to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
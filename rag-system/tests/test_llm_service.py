@@ -0,0 +1,72 @@
+"""Tests for LLM admission control: circuit breaker and health probes."""
+
+import time
+import asyncio
+
+from src.config.config import config
+from src.services.circuit_breaker import CLOSED, OPEN
+from src.services.llm_backends import StubLLMBackend
+from src.services.llm_service import LLMService
+
+
+RECOVERY_TIMEOUT = 0.05
+
+
+def make_service(monkeypatch, failure_rate: float = 0.0) -> LLMService:
+    """LLM service over an instant stub backend, with fallback and a fast-recovering circuit."""
+    monkeypatch.setattr(config, "enable_fallback", True)
+    monkeypatch.setattr(config, "circuit_failure_threshold", 1)
+    monkeypatch.setattr(config, "circuit_recovery_timeout", RECOVERY_TIMEOUT)
+    monkeypatch.setattr(config, "workers", 1)
+    backend = StubLLMBackend(latency=0.0, tokens_per_second=0.0, failure_rate=failure_rate, jitter=0.0)
+    return LLMService(backend=backend)
+
+
+def open_circuit(service: LLMService):
+    """Open the circuit and wait until a trial call is allowed."""
+    service.circuit.record_failure("boom")
+    assert service.circuit.state == OPEN
+    time.sleep(RECOVERY_TIMEOUT * 1.5)
+
+
+def test_successful_probe_closes_circuit(monkeypatch):
+    service = make_service(monkeypatch)
+    open_circuit(service)
+    
+    async def run():
+        assert await service.acheck_health() == "connected"
+        assert service.circuit.state == CLOSED
+        # The next request is admitted instead of falling back
+        answer, _ = await service.agenerate_answer("вопрос", "контекст")
+        return answer
+    
+    assert asyncio.run(run()).startswith("[stub]")
+
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    service = make_service(monkeypatch, failure_rate=1.0)
+    open_circuit(service)
+    
+    status = asyncio.run(service.acheck_health())
+    
+    assert status.startswith("error")
+    assert service.circuit.state == OPEN
+
+
+def test_probe_without_quota_keeps_trial_slot(monkeypatch):
+    service = make_service(monkeypatch)
+    open_circuit(service)
+    while service.limiter.try_acquire():
+        pass
+    
+    assert asyncio.run(service.acheck_health()) is None
+    assert service.circuit.state == OPEN
+    assert service.circuit.allow()
+
+
+def test_probe_skipped_while_circuit_open(monkeypatch):
+    service = make_service(monkeypatch)
+    service.circuit.record_failure("boom")
+    
+    assert asyncio.run(service.acheck_health()) == "error: circuit open"
+    assert service.circuit.state == OPEN
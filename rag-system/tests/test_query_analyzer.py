@@ -0,0 +1,49 @@
+"""Tests for rule-based filter extraction from question text."""
+
+import pytest
+
+from src.services.query_analyzer import QueryAnalyzer
+
+
+@pytest.fixture(scope="module")
+def analyzer() -> QueryAnalyzer:
+    return QueryAnalyzer(
+        cities=["Алматы", "Астана", "Семей"],
+        categories=["IT и технологии", "Медицина", "Многопрофильный"]
+    )
+
+
+@pytest.mark.parametrize("question, score", [
+    ("у меня 75 баллов ЕНТ, хочу в Алматы", 75),
+    ("ЕНТ 80, куда поступить?", 80),
+    ("сдал ент на 95", 95),
+    ("набрал 90 на ЕНТ", 90),
+    ("мой балл ЕНТ 110", 110),
+    ("с 85 на ЕНТе есть шансы?", 85),
+])
+def test_extracts_ent_score(analyzer, question, score):
+    assert analyzer.analyze(question)["min_score"] == score
+
+
+@pytest.mark.parametrize("question", [
+    "процентов 50 студентов получают гранты",
+    "в центре города 100 студентов",
+    "агентство 75 лет помогает абитуриентам",
+    "президент университета 60 лет",
+    "где учатся 30 студентов из Семея",
+])
+def test_ignores_numbers_near_words_containing_ent(analyzer, question):
+    assert "min_score" not in analyzer.analyze(question)
+
+
+def test_extracts_city_and_category(analyzer):
+    extracted = analyzer.analyze("IT университеты в Астане")
+    
+    assert extracted["city"] == "Астана"
+    assert extracted["category"] == ["IT и технологии", "Многопрофильный"]
+
+
+def test_explicit_filters_win(analyzer):
+    merged = analyzer.merge("75 баллов, Алматы", {"city": "Астана", "min_score": None})
+    
+    assert merged == {"min_score": 75, "city": "Астана"}
@@ -0,0 +1,94 @@
+"""Tests for LLM overload with fallback disabled: RateLimitExceeded and HTTP 429."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.config.config import config
+from src.models.schemas import QueryRequest
+from src.services.cache import ResponseCache
+from src.services.context_packer import ContextPacker
+from src.services.llm_backends import StubLLMBackend
+from src.services.llm_service import LLMService
+from src.services.query_planner import QueryPlan, SEARCH
+from src.services.rag_pipeline import RAGPipeline
+from src.services.rate_limiter import RateLimitExceeded
+
+
+SEARCH_RESULTS = {
+    "ids": [["uni_1"]],
+    "documents": [["Университет: Тестовый"]],
+    "metadatas": [[{
+        "id": 1, "name": "Тестовый", "city": "Алматы", "category": "IT и технологии",
+        "programs": "", "ent_min_score": 50, "ent_max_score": 100
+    }]],
+    "distances": [[0.2]]
+}
+
+
+def overloaded_service(monkeypatch) -> LLMService:
+    """LLM service without fallback whose quota is spent and queue is full."""
+    monkeypatch.setattr(config, "enable_fallback", False)
+    monkeypatch.setattr(config, "workers", 1)
+    monkeypatch.setattr(config, "max_requests_per_minute", 6)
+    monkeypatch.setattr(config, "llm_queue_size", 0)
+    service = LLMService(backend=StubLLMBackend(latency=0.0, tokens_per_second=0.0))
+    while service.limiter.try_acquire():
+        pass
+    return service
+
+
+def make_pipeline(llm_service: LLMService) -> RAGPipeline:
+    """Pipeline with in-memory cache and canned retrieval, no vector store."""
+    pipeline = RAGPipeline.__new__(RAGPipeline)
+    pipeline.llm_service = llm_service
+    pipeline.query_analyzer = None
+    pipeline.query_planner = None
+    pipeline.semantic_cache = None
+    pipeline.context_packer = ContextPacker(max_tokens=1000)
+    pipeline.cache = ResponseCache(max_size=10, ttl=60)
+    pipeline.cache_enabled = True
+    pipeline._inflight = {}
+    pipeline.coalesced_requests = 0
+    
+    async def aretrieve(request, start_time):
+        return None, SEARCH_RESULTS, None, QueryPlan(SEARCH, None, -1, -1, 5)
+    
+    pipeline._aretrieve = aretrieve
+    return pipeline
+
+
+def test_full_queue_raises_with_retry_after(monkeypatch):
+    service = overloaded_service(monkeypatch)
+    
+    with pytest.raises(RateLimitExceeded) as error:
+        asyncio.run(service.agenerate_answer("вопрос", "контекст"))
+    
+    # One token per 10 seconds at 6/min
+    assert 0 < error.value.retry_after <= 10
+
+
+def test_overloaded_query_returns_429(monkeypatch):
+    pipeline = make_pipeline(overloaded_service(monkeypatch))
+    monkeypatch.setattr(main, "rag_pipeline", pipeline)
+    
+    response = TestClient(main.app).post("/query", json={"question": "IT университеты"})
+    
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 10
+    assert len(pipeline.cache) == 0
+
+
+def test_overloaded_stream_ends_with_429_event(monkeypatch):
+    pipeline = make_pipeline(overloaded_service(monkeypatch))
+    
+    async def collect():
+        return [event async for event in pipeline.astream(QueryRequest(question="IT университеты"))]
+    
+    events = asyncio.run(collect())
+    
+    assert [name for name, _ in events] == ["sources", "error"]
+    assert events[-1][1]["status"] == 429
+    assert len(pipeline.cache) == 0